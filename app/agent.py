@@ -1,83 +1,538 @@
+import asyncio
+import atexit
 import json
+import threading
+import time
+import warnings
+from functools import lru_cache
+from typing import Callable, List
+
+import httpx
 from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph, MessagesState, START, END
 from langgraph.prebuilt import ToolNode
-from langchain_core.messages import SystemMessage, AIMessage
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import (
+    SystemMessage,
+    AIMessage,
+    HumanMessage,
+    message_to_dict,
+    messages_from_dict,
+)
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from langchain_core.utils.json import parse_partial_json
 
-from conf.env import LLM, LLM_API_KEY, LLM_BASE_URL
+from conf.env import (
+    AGENT_MAX_ITERATIONS,
+    LLM,
+    LLM_API_KEY,
+    LLM_BASE_URL,
+    LLM_TIMEOUT,
+    LLM_CONNECT_TIMEOUT,
+    LLM_MAX_CONNECTIONS,
+    LLM_MAX_KEEPALIVE_CONNECTIONS,
+    LLM_KEEPALIVE_EXPIRY,
+    LLM_DEADLINE,
+)
+from app import llm_cache, metrics
+from app.hedging import Provider, ahedged, hedged, primary
+from app.resilience import Deadline, acall_with_retry, call_with_retry
 from app.facts import get_fact_from_db, add_llm_fact
-from app.schema import Fact
+from app.schema import Fact, GeneratedFacts
 
 TOOLS = [get_fact_from_db, add_llm_fact]
 
+# Streaming a structured-output response makes langchain-openai serialize the
+# final chunk with the parsed object in a field typed as None, which pydantic
+# warns about on every call. The parsed result is unaffected.
+warnings.filterwarnings(
+    "ignore",
+    message=r"Pydantic serializer warnings:\s+PydanticSerializationUnexpectedValue"
+    r"\(Expected `none`[^\n]*field_name='parsed'",
+    category=UserWarning,
+)
+
+
+_llm_clients = {}
+_http_clients = []
+_async_http_clients = []
+_llm_lock = threading.Lock()
+
+
+def _get_chat_model(
+    model: str | None = LLM,
+    base_url: str | None = LLM_BASE_URL,
+    temperature: float = 0.7,
+    api_key: str | None = LLM_API_KEY,
+) -> ChatOpenAI:
+    """Return the process-wide chat model for (model, base_url, temperature, api_key).
+
+    Each entry owns an httpx client and an async one (for ainvoke/astream, as
+    used by the TUI), both with keep-alive and the pool limits from conf.env, so
+    repeated turns reuse connections instead of handshaking again.
+    """
+    key = ("chat", model, base_url, temperature, api_key)
+    llm = _llm_clients.get(key)
+    if llm is not None:
+        return llm
+
+    with _llm_lock:
+        llm = _llm_clients.get(key)
+        if llm is None:
+            timeout = httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+            limits = httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+            )
+            http_client = httpx.Client(timeout=timeout, limits=limits)
+            http_async_client = httpx.AsyncClient(timeout=timeout, limits=limits)
+            llm = ChatOpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                model=model,
+                temperature=temperature,
+                timeout=timeout,
+                # Retries are done by app.resilience, within the request deadline
+                max_retries=0,
+                http_client=http_client,
+                http_async_client=http_async_client,
+            )
+            # Registered only once the model exists, so a failed one leaks nothing
+            _http_clients.append(http_client)
+            _async_http_clients.append(http_async_client)
+            _llm_clients[key] = llm
+    return llm
 
-def _get_llm() -> ChatOpenAI:
-    llm = ChatOpenAI(
-        api_key=LLM_API_KEY, base_url=LLM_BASE_URL, model=LLM, temperature=0.7
+
+def _get_bound(kind: str, bind, **model_kwargs):
+    """Cache a derived runnable (tool-bound, structured output) per model config."""
+    chat_model = _get_chat_model(**model_kwargs)
+    key = (
+        kind,
+        chat_model.model_name,
+        chat_model.openai_api_base,
+        chat_model.temperature,
+        chat_model.openai_api_key,
     )
-    return llm.bind_tools(TOOLS)
+    llm = _llm_clients.get(key)
+    if llm is None:
+        with _llm_lock:
+            llm = _llm_clients.setdefault(key, bind(chat_model))
+    return llm
 
 
-def create_agent_state_graph(known_facts: str, user_id: int):
-    def model(state: MessagesState):
-        """LLM node (Studio calls this 'model')"""
-        system_message = SystemMessage(
-            content=f"""You are a helpful assistant that provides interesting facts to users. The facts can be in either of two categories -- 'happy' or 'sad'.
-                If the user asks for a fact from the database, use the tool 'get_fact_from_db' to retrieve a fact from the specified category.
-                If there are no facts in that category in the database, generate one yourself, save that to the database using the 'add_llm_fact', and then pass it to the user.
-                If the user requests you to generate a fact yourself, use the tool 'add_llm_fact' to add the fact to the database before you pass it to the user.
-                Do not make up facts on your own. Keep the facts short, within 1 or 2 sentences. Do not tell users facts that they have already been told.
-                Make sure to use the tools provided to you to get or add facts.
-                Always ensure that the facts you provide are relevant to the requested category.
+def _get_llm(**model_kwargs):
+    """Return the process-wide tool-bound chat model used by the agent graph."""
+    return _get_bound("tools", lambda m: m.bind_tools(TOOLS), **model_kwargs)
+
+
+def _get_fact_writer(**model_kwargs):
+    """Return the process-wide chat model that answers with GeneratedFacts."""
+    return _get_bound(
+        "facts", lambda m: m.with_structured_output(GeneratedFacts), **model_kwargs
+    )
+
 
-                Do NOT call tools more than once per request.
+@lru_cache(maxsize=1)
+def _tool_schemas() -> list:
+    return [convert_to_openai_tool(tool) for tool in TOOLS]
 
-                All the tools require a user_id parameter to identify the user making the request. The user_id is: {user_id}
 
-                Here are some facts that have already been provided to the user:
+def _cache_key(kind: str, messages: list, cache: bool = True) -> str | None:
+    """Response cache key of a call to the primary model, or None to bypass the cache.
+
+    kind is "tools" for the tool-bound agent model and "facts" for the fact writer.
+    An answer from a hedge is stored under the same key.
+    """
+    chat_model = _get_chat_model(**primary().model_kwargs)
+    if not llm_cache.should_cache(chat_model.temperature, cache):
+        return None
+    settings = {
+        "kind": kind,
+        "model": chat_model.model_name,
+        "base_url": chat_model.openai_api_base,
+        "temperature": chat_model.temperature,
+    }
+    schema = _tool_schemas() if kind == "tools" else GeneratedFacts.model_json_schema()
+    return llm_cache.response_key(settings, messages, schema)
+
+
+def _fact_writer_messages(category: str, k: int, known_facts: str) -> list:
+    return [
+        SystemMessage(
+            content=f"""You are a helpful assistant that provides interesting facts to users. The facts can be in either of two categories -- 'happy' or 'sad'.
+                Do not make up facts. Keep each fact short, within 1 or 2 sentences. Every fact must be different from the others.
+                Always ensure that the facts are relevant to the requested category.
+
+                Do not repeat any of these facts that have already been provided to the user:
                 {known_facts}
                 """
+        ),
+        HumanMessage(content=f"Give me {k} distinct {category} facts."),
+    ]
+
+
+def _distinct_facts(result: GeneratedFacts, k: int) -> List[str]:
+    facts = []
+    seen = set()
+    for text in result.facts:
+        text = text.strip()
+        key = " ".join(text.lower().split())
+        if text and key not in seen:
+            seen.add(key)
+            facts.append(text)
+    return facts[:k]
+
+
+class _PartialFactText:
+    """Pulls the fact text out of a model response while it streams in.
+
+    The model writes JSON, either as message content (structured output) or as
+    tool call arguments, and feed() returns the text of the first fact so far
+    (facts[0] of GeneratedFacts, fact_text of an add_llm_fact call or of a tool
+    result) whenever it has grown, else None.
+    """
+
+    def __init__(self):
+        self._message_id = None
+        self._buffer = ""
+        self._complete = False
+        self.text = ""
+
+    def feed(self, message) -> str | None:
+        if message.id != self._message_id:
+            self._message_id = message.id
+            self._buffer = ""
+            self._complete = False
+        elif self._complete:
+            # The rest of a batch is not shown, so stop reparsing the buffer
+            return None
+        if isinstance(message.content, str):
+            self._buffer += message.content
+        for call in getattr(message, "tool_call_chunks", ()):
+            self._buffer += call.get("args") or ""
+
+        data = parse_partial_json(self._buffer) if self._buffer.startswith("{") else None
+        if not isinstance(data, dict):
+            return None
+        facts = data.get("facts")
+        if isinstance(facts, list) and len(facts) > 1:
+            self._complete = True
+        text = facts[0] if isinstance(facts, list) and facts else data.get("fact_text")
+        if not isinstance(text, str) or not text or text == self.text:
+            return None
+        self.text = text
+        return text
+
+
+class _StreamFactText(BaseCallbackHandler):
+    """Callback passing each streamed model chunk through _PartialFactText.
+
+    run_inline makes async runs call it on the event loop rather than on an
+    executor thread, so on_text may update UI widgets (e.g. in the TUI).
+    """
+
+    run_inline = True
+
+    def __init__(self, on_text: Callable[[str], None]):
+        self.on_text = on_text
+        self.partial = _PartialFactText()
+
+    def on_llm_new_token(self, token, *, chunk=None, **kwargs):
+        if chunk is not None:
+            text = self.partial.feed(chunk.message)
+            if text is not None:
+                self.on_text(text)
+
+
+def _cached_facts(
+    key: str | None, on_text: Callable[[str], None] | None
+) -> GeneratedFacts | None:
+    cached = llm_cache.lookup(key) if key is not None else None
+    if cached is None:
+        return None
+    result = GeneratedFacts.model_validate_json(cached)
+    if on_text is not None and result.facts:
+        on_text(result.facts[0])
+    return result
+
+
+def generate_llm_facts(
+    category: str,
+    k: int,
+    known_facts: str = "",
+    on_text: Callable[[str], None] | None = None,
+    cache: bool = True,
+) -> List[str]:
+    """Ask the model for k distinct facts in the category in a single call.
+
+    The facts are not stored; see app.facts.add_llm_facts. Duplicates (after
+    normalizing case and whitespace) are dropped, so fewer than k may be returned.
+    With on_text, the response is streamed and on_text is called with the text
+    of the first fact each time it grows. With cache=False the response cache
+    is bypassed, so the model is always asked. With several LLM_PROVIDERS the
+    call is hedged (see app.hedging). Raises LLMUnavailableError when the model
+    cannot answer within LLM_DEADLINE (see app.resilience).
+    """
+    messages = _fact_writer_messages(category, k, known_facts)
+    key = _cache_key("facts", messages, cache)
+    result = _cached_facts(key, on_text)
+    if result is not None:
+        return _distinct_facts(result, k)
+
+    def write(provider: Provider, timeout: float) -> GeneratedFacts:
+        writer = _get_fact_writer(**provider.model_kwargs)
+        # Only the primary streams, so hedges never interleave their text with it
+        if on_text is None or not provider.primary:
+            return writer.invoke(messages, timeout=timeout)
+        result = None
+        config = {"callbacks": [_StreamFactText(on_text)]}
+        for result in writer.stream(messages, config=config, timeout=timeout):
+            pass
+        return result
+
+    start = time.perf_counter()
+    result = call_with_retry(
+        lambda timeout: hedged(write, timeout), Deadline.after(LLM_DEADLINE)
+    )
+    if key is not None:
+        llm_cache.store(key, result.model_dump_json(), time.perf_counter() - start)
+    return _distinct_facts(result, k)
+
+
+async def agenerate_llm_facts(
+    category: str,
+    k: int,
+    known_facts: str = "",
+    on_text: Callable[[str], None] | None = None,
+    cache: bool = True,
+) -> List[str]:
+    """Async variant of generate_llm_facts."""
+    messages = _fact_writer_messages(category, k, known_facts)
+    key = _cache_key("facts", messages, cache)
+    result = _cached_facts(key, on_text)
+    if result is not None:
+        return _distinct_facts(result, k)
+
+    async def write(provider: Provider, timeout: float) -> GeneratedFacts:
+        writer = _get_fact_writer(**provider.model_kwargs)
+        if on_text is None or not provider.primary:
+            return await writer.ainvoke(messages, timeout=timeout)
+        result = None
+        config = {"callbacks": [_StreamFactText(on_text)]}
+        async for result in writer.astream(messages, config=config, timeout=timeout):
+            pass
+        return result
+
+    start = time.perf_counter()
+    result = await acall_with_retry(
+        lambda timeout: ahedged(write, timeout), Deadline.after(LLM_DEADLINE)
+    )
+    if key is not None:
+        llm_cache.store(key, result.model_dump_json(), time.perf_counter() - start)
+    return _distinct_facts(result, k)
+
+
+def _take_clients() -> tuple[list, list]:
+    """Empty the registry and hand back its sync and async HTTP clients."""
+    with _llm_lock:
+        _llm_clients.clear()
+        clients, async_clients = _http_clients[:], _async_http_clients[:]
+        _http_clients.clear()
+        _async_http_clients.clear()
+    return clients, async_clients
+
+
+async def _aclose_all(async_clients: list) -> None:
+    for client in async_clients:
+        try:
+            await client.aclose()
+        except RuntimeError:
+            # Its connections belong to an event loop that has already closed
+            pass
+
+
+@atexit.register
+def close_llm_clients() -> None:
+    """Close every pooled HTTP connection held by the LLM client registry.
+
+    Async clients are closed on a new event loop, which only works for those
+    with no connections left on a loop that has ended; an application making
+    async model calls should await aclose_llm_clients() before its loop ends.
+    """
+    clients, async_clients = _take_clients()
+    for client in clients:
+        client.close()
+    if async_clients:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(_aclose_all(async_clients))
+
+
+async def aclose_llm_clients() -> None:
+    """Close every pooled HTTP connection, on the event loop that made the async calls."""
+    clients, async_clients = _take_clients()
+    for client in clients:
+        client.close()
+    await _aclose_all(async_clients)
+
+
+class AgentState(MessagesState):
+    """Graph state: the conversation plus the per-request user context."""
+
+    user_id: int
+    known_facts: str
+
+
+def _system_message(state: AgentState) -> SystemMessage:
+    return SystemMessage(
+        content=f"""You are a helpful assistant that provides interesting facts to users. The facts can be in either of two categories -- 'happy' or 'sad'.
+            If the user asks for a fact from the database, use the tool 'get_fact_from_db' to retrieve a fact from the specified category.
+            If there are no facts in that category in the database, generate one yourself, save that to the database using the 'add_llm_fact', and then pass it to the user.
+            If the user requests you to generate a fact yourself, use the tool 'add_llm_fact' to add the fact to the database before you pass it to the user.
+            Do not make up facts on your own. Keep the facts short, within 1 or 2 sentences. Do not tell users facts that they have already been told.
+            Make sure to use the tools provided to you to get or add facts.
+            Always ensure that the facts you provide are relevant to the requested category.
+
+            Do NOT call tools more than once per request.
+
+            All the tools require a user_id parameter to identify the user making the request. The user_id is: {state.get("user_id")}
+
+            Here are some facts that have already been provided to the user:
+            {state.get("known_facts", "")}
+            """
+    )
+
+
+def _cached_output(messages: list, config: RunnableConfig):
+    """Return (cache key or None, cached model output or None) for an agent turn.
+
+    Run the graph with config={"configurable": {"llm_cache": False}} to bypass
+    the response cache.
+    """
+    cache = config.get("configurable", {}).get("llm_cache", True)
+    key = _cache_key("tools", messages, cache)
+    cached = llm_cache.lookup(key) if key is not None else None
+    if cached is None:
+        return key, None
+    output = messages_from_dict([json.loads(cached)])[0]
+    # A fresh id, so the replayed message is never merged with an earlier one
+    output.id = None
+    return key, output
+
+
+def _store_output(key: str | None, output: AIMessage, start: float) -> None:
+    if key is not None:
+        latency = time.perf_counter() - start
+        llm_cache.store(key, json.dumps(message_to_dict(output)), latency)
+
+
+def _deadline(config: RunnableConfig) -> Deadline:
+    """The request's deadline from run_agent, or a fresh one (e.g. in Studio)."""
+    deadline = config.get("configurable", {}).get("deadline")
+    return deadline if deadline is not None else Deadline.after(LLM_DEADLINE)
+
+
+def model(state: AgentState, config: RunnableConfig):
+    """LLM node (Studio calls this 'model')"""
+    messages = [_system_message(state)] + state["messages"]
+    key, output = _cached_output(messages, config)
+    if output is None:
+
+        def invoke(provider: Provider, timeout: float) -> AIMessage:
+            return _get_llm(**provider.model_kwargs).invoke(messages, timeout=timeout)
+
+        start = time.perf_counter()
+        output = call_with_retry(
+            lambda timeout: hedged(invoke, timeout), _deadline(config)
+        )
+        _store_output(key, output, start)
+    return {"messages": [output]}
+
+
+async def amodel(state: AgentState, config: RunnableConfig):
+    """Async variant of the LLM node, used when the graph runs with ainvoke."""
+    messages = [_system_message(state)] + state["messages"]
+    key, output = _cached_output(messages, config)
+    if output is None:
+
+        async def invoke(provider: Provider, timeout: float) -> AIMessage:
+            return await _get_llm(**provider.model_kwargs).ainvoke(messages, timeout=timeout)
+
+        start = time.perf_counter()
+        output = await acall_with_retry(
+            lambda timeout: ahedged(invoke, timeout), _deadline(config)
         )
-        llm = _get_llm()
-        output = llm.invoke([system_message] + state["messages"])
-        return {"messages": [output]}
-
-    def format_fact(state: MessagesState):
-        """Terminal node that extracts the final fact."""
-        messages = state["messages"]
-
-        for msg in reversed(messages):
-            if hasattr(msg, "name") and msg.name in [
-                "get_fact_from_db",
-                "add_llm_fact",
-            ]:
-                try:
-                    data = json.loads(msg.content)
-                    Fact(**data)  # validate
-                    return {"messages": [AIMessage(content=msg.content)]}
-                except Exception:
-                    continue
-
-        error = {
-            "fact_id": -1,
-            "fact_text": "Error: The AI assistant failed to retrieve a fact.",
-        }
-        return {"messages": [AIMessage(content=json.dumps(error))]}
-
-    def route_model(state: MessagesState):
-        """Required Studio routing — but with your STOP condition."""
-        last = state["messages"][-1]
-        if last.tool_calls:
-            return "tools"
+        _store_output(key, output, start)
+    return {"messages": [output]}
+
+
+def format_fact(state: AgentState):
+    """Terminal node that extracts the final fact."""
+    messages = state["messages"]
+
+    for msg in reversed(messages):
+        if hasattr(msg, "name") and msg.name in [
+            "get_fact_from_db",
+            "add_llm_fact",
+        ]:
+            try:
+                data = json.loads(msg.content)
+                Fact(**data)  # validate
+                return {"messages": [AIMessage(content=msg.content)]}
+            except Exception:
+                continue
+
+    error = {
+        "fact_id": -1,
+        "fact_text": "Error: The AI assistant failed to retrieve a fact.",
+    }
+    return {"messages": [AIMessage(content=json.dumps(error))]}
+
+
+def _model_turns(messages: list) -> int:
+    """Model replies since the request's last human message."""
+    turns = 0
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            break
+        if isinstance(message, AIMessage):
+            turns += 1
+    return turns
+
+
+def route_model(state: AgentState):
+    """Required Studio routing — but with your STOP condition.
+
+    A model that still calls tools after AGENT_MAX_ITERATIONS turns is stopped,
+    and format_fact answers with the last fact a tool returned, if any.
+    """
+    last = state["messages"][-1]
+    if not last.tool_calls:
+        return "format_fact"
+    if _model_turns(state["messages"]) >= AGENT_MAX_ITERATIONS:
+        metrics.increment("agent.iteration_limit")
         return "format_fact"
+    return "tools"
 
-    def route_tools(_):
-        """After tool execution, ALWAYS go back to model once."""
-        return "model"
 
-    graph = StateGraph(MessagesState)
+def route_tools(_):
+    """After tool execution, ALWAYS go back to model once."""
+    return "model"
 
-    graph.add_node("model", model)
+
+def build_agent_graph():
+    """Build and compile the agent graph.
+
+    The graph holds no per-user data; callers pass user_id and known_facts in the
+    input state. Use get_agent_graph() to share one compiled graph per process.
+    """
+    graph = StateGraph(AgentState)
+
+    graph.add_node("model", RunnableLambda(model, afunc=amodel))
     graph.add_node("tools", ToolNode(TOOLS))
     graph.add_node("format_fact", format_fact)
 
@@ -87,3 +542,64 @@ def create_agent_state_graph(known_facts: str, user_id: int):
     graph.add_edge("format_fact", END)
 
     return graph.compile()
+
+
+@lru_cache(maxsize=1)
+def get_agent_graph():
+    """Return the process-wide compiled agent graph."""
+    return build_agent_graph()
+
+
+def _run_config(cache: bool) -> RunnableConfig:
+    deadline = Deadline.after(LLM_DEADLINE)
+    return {"configurable": {"llm_cache": cache, "deadline": deadline}}
+
+
+def run_agent(
+    agent_input: dict,
+    on_text: Callable[[str], None] | None = None,
+    cache: bool = True,
+) -> dict:
+    """Run the agent graph and return its final state.
+
+    With on_text, the graph is streamed in "messages" mode and on_text is called
+    with the fact text so far each time the model's output extends it. All model
+    turns share one LLM_DEADLINE; LLMUnavailableError is raised when the model
+    cannot answer in time. cache=False bypasses the response cache.
+    """
+    graph = get_agent_graph()
+    config = _run_config(cache)
+    if on_text is None:
+        return graph.invoke(agent_input, config=config)
+    partial = _PartialFactText()
+    state = None
+    for mode, payload in graph.stream(
+        agent_input, config=config, stream_mode=["messages", "values"]
+    ):
+        if mode == "values":
+            state = payload
+        elif (text := partial.feed(payload[0])) is not None:
+            on_text(text)
+    return state
+
+
+async def arun_agent(
+    agent_input: dict,
+    on_text: Callable[[str], None] | None = None,
+    cache: bool = True,
+) -> dict:
+    """Async variant of run_agent."""
+    graph = get_agent_graph()
+    config = _run_config(cache)
+    if on_text is None:
+        return await graph.ainvoke(agent_input, config=config)
+    partial = _PartialFactText()
+    state = None
+    async for mode, payload in graph.astream(
+        agent_input, config=config, stream_mode=["messages", "values"]
+    ):
+        if mode == "values":
+            state = payload
+        elif (text := partial.feed(payload[0])) is not None:
+            on_text(text)
+    return state
@@ -1,21 +1,35 @@
 import uuid
 import keyring
-from passlib.context import CryptContext
 
 from conf.database import SessionLocal
+from conf.env import KEYRING_PASSWORD
 from models import User, SessionToken
-
-pwd_context = CryptContext(
-    schemes=["argon2"],
-    default="argon2",
-    # Argon2 parameters (recommended defaults):
-    argon2__time_cost=2,
-    argon2__memory_cost=102400,  # In kilobytes (100MB)
-    argon2__parallelism=8,
-)
+from app.passwords import hash_password, verify_password
+from app.session_cache import clear_cached_user, load_cached_user, save_cached_user
 
 SERVICE_NAME = "factscli"  # keyring service name
 
+_keyring_ready = False
+_users_by_token = {}
+_current_user = None
+
+
+def _keyring():
+    """Return the keyring module, backed by the app's encrypted file keyring.
+
+    The backend is set up on first use rather than at import time, because
+    loading it is slow and only commands that touch the session need it.
+    """
+    global _keyring_ready
+    if not _keyring_ready:
+        from keyrings.cryptfile.cryptfile import CryptFileKeyring
+
+        app_keyring = CryptFileKeyring()
+        app_keyring.keyring_key = KEYRING_PASSWORD
+        keyring.set_keyring(app_keyring)
+        _keyring_ready = True
+    return keyring
+
 
 def signup(username: str, password: str) -> bool:
     db = SessionLocal()
@@ -24,8 +38,7 @@ def signup(username: str, password: str) -> bool:
         if existing:
             return False
 
-        # Hashing logic remains the same, but now uses the Argon2 scheme
-        hashed = pwd_context.hash(password)
+        hashed = hash_password(password)
 
         user = User(username=username, password_hash=hashed)
         db.add(user)
@@ -42,28 +55,36 @@ def login(username: str, password: str) -> str | None:
         if not user:
             return None
 
-        # Verification logic remains the same, using the Argon2 scheme
-        if not pwd_context.verify(password, user.password_hash):
+        ok, new_hash = verify_password(password, user.password_hash)
+        if not ok:
             return None
+        if new_hash:
+            # Stored hash predates the current profile, upgrade it
+            user.password_hash = new_hash
 
         token = str(uuid.uuid4())
         session = SessionToken(token=token, user_id=user.id)
         db.add(session)
         db.commit()
-        keyring.set_password(SERVICE_NAME, "session_token", token)
+        _keyring().set_password(SERVICE_NAME, "session_token", token)
+        save_cached_user(token, user)
         return token
     finally:
         db.close()
 
 
 def logout(token: str | None):
+    global _current_user
+    _current_user = None
+    _users_by_token.clear()
+    clear_cached_user()
     db = SessionLocal()
     try:
         if token:
             db.query(SessionToken).filter(SessionToken.token == token).delete()
             db.commit()
         try:
-            keyring.delete_password(SERVICE_NAME, "session_token")
+            _keyring().delete_password(SERVICE_NAME, "session_token")
         except keyring.errors.PasswordDeleteError:
             pass
     finally:
@@ -73,19 +94,46 @@ def logout(token: str | None):
 def get_user_by_token(token: str | None):
     if not token:
         return None
+    if token in _users_by_token:
+        return _users_by_token[token]
     db = SessionLocal()
     try:
-        s = db.query(SessionToken).filter(SessionToken.token == token).first()
-        if not s:
-            return None
-        user = db.query(User).get(s.user_id)
+        user = (
+            db.query(User)
+            .join(SessionToken, SessionToken.user_id == User.id)
+            .filter(SessionToken.token == token)
+            .first()
+        )
+        if user:
+            _users_by_token[token] = user
         return user
     finally:
         db.close()
 
 
+def get_current_user():
+    """Resolve the logged-in user, or None if there is no valid session.
+
+    Cheapest source first: the user already resolved in this process, then the
+    local session cache, and only then the keyring and the database. Returns
+    either a User or a SessionUser; both have id and username.
+    """
+    global _current_user
+    if _current_user is not None:
+        return _current_user
+
+    user = load_cached_user()
+    if user is None:
+        token = get_local_token()
+        user = get_user_by_token(token)
+        if user is not None:
+            save_cached_user(token, user)
+    _current_user = user
+    return user
+
+
 def get_local_token():
     try:
-        return keyring.get_password(SERVICE_NAME, "session_token")
+        return _keyring().get_password(SERVICE_NAME, "session_token")
     except Exception:
         return None
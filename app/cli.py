@@ -1,21 +1,33 @@
+from itertools import islice
+from typing import Iterator
+
 import typer
 from rich.console import Console
+from rich.live import Live
 from rich.panel import Panel
 from rich.text import Text
 
-from app.facts import add_fact, get_user_history
-from app.fact_handler import retrieve_fact
-from app.auth import get_local_token, get_user_by_token, logout, login, signup
+from app.facts import (
+    ADDED,
+    DUPLICATE,
+    add_fact,
+    count_user_history,
+    iter_user_history,
+)
+from app.auth import (
+    get_current_user,
+    get_local_token,
+    get_user_by_token,
+    logout,
+    login,
+    signup,
+)
 
 
 def get_user():
-    token = get_local_token()
-    if not token:
-        typer.echo("Not logged in. Please login first.")
-        raise typer.Exit()
-    user = get_user_by_token(token)
+    user = get_current_user()
     if not user:
-        typer.echo("Session invalid. Please login again.")
+        typer.echo("Not logged in or session invalid. Please login first.")
         raise typer.Exit()
     return user
 
@@ -30,24 +42,66 @@ def login_user(username: str, password: str):
 
 
 def get_fact(category: str) -> str:
+    from app.fact_handler import retrieve_fact
+
     user = get_user()
     if category == "random":
         category = None
     return retrieve_fact(category, user.id, show_animation=True)
 
 
+def get_facts(category: str, n: int) -> list[dict]:
+    from app.fact_handler import retrieve_facts
+
+    user = get_user()
+    if category == "random":
+        category = None
+    return retrieve_facts(category, user.id, n)
+
+
 def add_fact_from_user(category: str, fact: str):
     user = get_user()
     return add_fact(category, fact, user.id)
 
 
-def retrieve_history() -> str:
+def retrieve_history(limit: int | None = None, page: int = 1) -> Iterator[str]:
+    """Yield the user's history as lines, newest first, one page of limit facts."""
     user = get_user()
-    history = get_user_history(user_id=user.id)
-    return "\n".join([f"- {hist}" for hist in history]) if history else "No history yet"
+    entries = iter_user_history(user_id=user.id, page_size=limit or 500)
+    if limit is not None:
+        # Earlier pages are walked by keyset rather than skipped with OFFSET
+        entries = islice(entries, (page - 1) * limit, page * limit)
+    for entry in entries:
+        yield f"- {entry.fact}"
+
+
+def retrieve_history_count() -> int:
+    user = get_user()
+    return count_user_history(user.id)
+
+
+def show_fact(
+    console: Console, category: str | None, user_id: int, title: str, style: str
+):
+    """Print a fact in a panel, filling it in as generated text streams in."""
+    from app.fact_handler import retrieve_fact
+
+    def panel(fact) -> Panel:
+        return Panel(fact, title=f"[{style}]{title}[/{style}]", border_style=style)
+
+    placeholder = Text("Loading some facts for you...", style="dim")
+    with Live(panel(placeholder), console=console, refresh_per_second=20) as live:
+        fact = retrieve_fact(
+            category=category,
+            user_id=user_id,
+            on_text=lambda text: live.update(panel(Text(text))),
+        )
+        live.update(panel(fact))
 
 
 def interactive_shell():
+    from app.fact_handler import route_summary
+
     console = Console()
 
     # Display banner
@@ -69,8 +123,7 @@ def interactive_shell():
     console.print(Panel(banner, border_style="bright_blue", padding=(1, 2)))
 
     # Check if user is logged in
-    token = get_local_token()
-    user = get_user_by_token(token) if token else None
+    user = get_current_user()
 
     if not user:
         console.print("\n[yellow]You need to login or signup first.[/yellow]\n")
@@ -102,7 +155,7 @@ def interactive_shell():
         f"\n[green]✓ Logged in as:[/green] [bold cyan]{user.username}[/bold cyan]"
     )
     console.print(
-        "\n[dim]Commands: happy, sad, random, add, history, whoami, logout, quit[/dim]"
+        "\n[dim]Commands: happy, sad, random, add, history, stats, whoami, logout, quit[/dim]"
     )
     console.print("[bright_blue]" + "=" * 60 + "[/bright_blue]\n")
 
@@ -133,59 +186,90 @@ def interactive_shell():
                 )
 
             elif cmd == "happy":
-                fact = retrieve_fact(
-                    category="happy", user_id=user.id, show_animation=True
-                )
-                console.print(
-                    Panel(
-                        fact,
-                        title="[yellow]😊 Happy Fact[/yellow]",
-                        border_style="yellow",
-                    )
-                )
+                show_fact(console, "happy", user.id, "😊 Happy Fact", "yellow")
 
             elif cmd == "sad":
-                fact = retrieve_fact(
-                    category="sad", user_id=user.id, show_animation=True
-                )
-                console.print(
-                    Panel(fact, title="[blue]😢 Sad Fact[/blue]", border_style="blue")
-                )
+                show_fact(console, "sad", user.id, "😢 Sad Fact", "blue")
 
             elif cmd == "random":
-                fact = retrieve_fact(
-                    category=None, user_id=user.id, show_animation=True
-                )
-                console.print(
-                    Panel(
-                        fact,
-                        title="[magenta]🎲 Random Fact[/magenta]",
-                        border_style="magenta",
-                    )
-                )
+                show_fact(console, None, user.id, "🎲 Random Fact", "magenta")
 
             elif cmd == "add":
                 category = typer.prompt("Category (happy/sad)").lower()
                 fact_text = typer.prompt("Fact")
-                if add_fact(category, fact_text, user.id):
+                result = add_fact(category, fact_text, user.id)
+                if result == ADDED:
                     console.print("[green]✓ Fact added![/green]")
+                elif result == DUPLICATE:
+                    console.print("[yellow]A very similar fact already exists.[/yellow]")
                 else:
                     console.print("[red]✗ Invalid category. Use: happy or sad[/red]")
 
             elif cmd == "history":
-                history = get_user_history(user.id)
+                history = [entry.fact for entry in iter_user_history(user.id, limit=10)]
                 if history:
                     console.print("\n[bold cyan]📜 Your History[/bold cyan]")
-                    for i, h in enumerate(history[:10], 1):
+                    for i, h in enumerate(history, 1):
                         console.print(f"[dim]{i}.[/dim] {h}")
                     console.print()
                 else:
                     console.print("[yellow]No history yet.[/yellow]")
 
+            elif cmd == "stats":
+                summary = route_summary()
+                db_latency = summary["db_latency"]
+                prefetch_latency = summary["prefetch_latency"]
+                llm_latency = summary["llm_latency"]
+                console.print(f"[cyan]Fact requests:[/cyan] {summary['requests']}")
+                console.print(
+                    f"[cyan]Served without the LLM:[/cyan] {summary['llm_avoided']:.0%}"
+                )
+                if db_latency is not None:
+                    console.print(
+                        f"[cyan]Mean database latency:[/cyan] {db_latency * 1000:.1f} ms"
+                    )
+                if prefetch_latency is not None:
+                    console.print(
+                        f"[cyan]Mean prefetched latency:[/cyan] {prefetch_latency * 1000:.1f} ms"
+                    )
+                if llm_latency is not None:
+                    console.print(
+                        f"[cyan]Mean LLM latency:[/cyan] {llm_latency * 1000:.1f} ms"
+                    )
+                console.print(
+                    f"[cyan]LLM unavailable:[/cyan] {summary['llm_unavailable']} requests, "
+                    f"{summary['llm_retries']} retries, circuit breaker {summary['breaker']}"
+                )
+                cache = summary["fact_cache"]
+                console.print(
+                    f"[cyan]Fact cache:[/cyan] {cache['hit_rate']:.0%} hits, "
+                    f"{cache['entries']} facts, {cache['bytes'] / 2**20:.1f} of "
+                    f"{cache['max_bytes'] / 2**20:.1f} MiB"
+                )
+                responses = summary["llm_cache"]
+                console.print(
+                    f"[cyan]LLM response cache ({responses['backend']}):[/cyan] "
+                    f"{responses['hits']} hits, {responses['misses']} misses, "
+                    f"{responses['saved_seconds']:.1f} s of model time saved"
+                )
+                hedging = summary["hedging"]
+                if hedging["enabled"]:
+                    console.print(
+                        f"[cyan]Hedged LLM calls:[/cyan] {hedging['hedges']} sent, "
+                        f"{hedging['hedge_wins']} answered first"
+                    )
+                    for name, provider in hedging["providers"].items():
+                        p95 = provider["p95"]
+                        console.print(
+                            f"  [dim]{name}:[/dim] p95 "
+                            + ("n/a" if p95 is None else f"{p95 * 1000:.0f} ms")
+                            + f", hedge after {provider['hedge_delay'] * 1000:.0f} ms"
+                        )
+
             else:
                 console.print(f"[red]Unknown command:[/red] {cmd}")
                 console.print(
-                    "[dim]Available: happy, sad, random, add, history, whoami, logout, quit[/dim]"
+                    "[dim]Available: happy, sad, random, add, history, stats, whoami, logout, quit[/dim]"
                 )
 
         except KeyboardInterrupt:
@@ -0,0 +1,234 @@
+"""Near-duplicate detection for facts with MinHash and locality-sensitive hashing.
+
+A fact is reduced to its set of content words (lowercased, stopwords dropped,
+plurals and "-ing" stripped). Each word is hashed with BLAKE2b into 36
+independent 32-bit values, and the per-position minimum over all words is the
+fact's MinHash signature. The signature is cut into 12 bands of 3 values, and
+each band is hashed together with the category and band number into a bucket
+key stored in dedup_buckets. Facts with a Jaccard similarity of 0.6 share at
+least one bucket about 95% of the time (0.8 at 0.5), while facts with only a
+word or two in common rarely do. A lookup is therefore 12 primary-key seeks
+plus an exact Jaccard check of the few facts found, however large the table is.
+
+With DEDUP_ENABLED off nothing is checked or indexed, which also makes bulk
+imports several times faster. Run `factscli rebuild-dedup-index` after turning
+it back on, and after changing the hashing, the band layout or the tokenizer,
+which changes every bucket.
+"""
+import hashlib
+import re
+import struct
+from functools import lru_cache
+from typing import Iterable
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from conf.database import SessionLocal
+from conf.env import DEDUP_ENABLED, DEDUP_THRESHOLD
+from models import DedupBucket, Fact
+
+NUM_BANDS = 12
+ROWS_PER_BAND = 3
+# Verify at most this many candidates; more only happens with degenerate facts
+MAX_CANDIDATES = 50
+
+# Negations (no, nor, not, don't) are content words: without them a fact and
+# its opposite would have the same tokens
+NEGATIONS = frozenset("no nor not never none cannot without".split())
+STOPWORDS = frozenset(
+    """
+    a about above after again all also am an and any are as at be because been
+    being but by can could did do does doing during each few for from had
+    has have having he her here hers him his how i if in into is it its itself
+    just may me might more most my now of off on once only or other
+    our out over own same she should so some such than that the their them then
+    there these they this those through to too under until up very was we were
+    what when where which while who whom why will with would you your
+    """.split()
+)
+
+_WORD = re.compile(r"[a-z0-9']+")
+# Each 64-byte digest of a word gives 16 of its signature hash values
+_DIGESTS = -(-NUM_BANDS * ROWS_PER_BAND // 16)
+_PERSONS = [f"factdup{i}".encode() for i in range(_DIGESTS)]
+_SIGNATURE = struct.Struct(f"<{16 * _DIGESTS}I")
+_BAND = struct.Struct(f"<B{ROWS_PER_BAND}I")
+
+
+def _stem(word: str) -> str:
+    """Strip the commonest inflections, so "otters holding" matches "otter holds"."""
+    if len(word) > 5 and word.endswith("ing"):
+        return word[:-3]
+    if len(word) > 4 and word.endswith(("ses", "xes", "zes", "ches", "shes")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def fact_tokens(text: str) -> frozenset[str]:
+    """The set of content words a fact is compared on."""
+    return frozenset(
+        _stem(word) for word in _WORD.findall(text.lower()) if word not in STOPWORDS
+    )
+
+
+def negated(tokens: frozenset[str]) -> bool:
+    """Whether a token set contains a negation, e.g. "not" or "doesn't"."""
+    return any(token in NEGATIONS or token.endswith("n't") for token in tokens)
+
+
+def similarity(a: frozenset[str], b: frozenset[str]) -> float:
+    """Jaccard similarity of two token sets."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+@lru_cache(maxsize=65536)
+def _word_hashes(word: str) -> tuple[int, ...]:
+    digest = b"".join(
+        hashlib.blake2b(word.encode(), digest_size=64, person=person).digest()
+        for person in _PERSONS
+    )
+    return _SIGNATURE.unpack(digest)[:NUM_BANDS * ROWS_PER_BAND]
+
+
+def lsh_buckets(category: str, tokens: Iterable[str]) -> list[int]:
+    """The NUM_BANDS bucket keys of a token set, as signed 64-bit integers."""
+    signature = [min(values) for values in zip(*map(_word_hashes, tokens))]
+    prefix = category.encode()
+    buckets = []
+    for band in range(NUM_BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(prefix + _BAND.pack(band, *rows), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, "big", signed=True))
+    return buckets
+
+
+def _bucket_rows(fact_id: int, category: str, text: str) -> list[dict]:
+    tokens = fact_tokens(text)
+    if not tokens:
+        return []
+    return [
+        {"bucket": bucket, "fact_id": fact_id}
+        for bucket in lsh_buckets(category, tokens)
+    ]
+
+
+def find_near_duplicate(
+    db: Session, category: str, text: str, threshold: float = DEDUP_THRESHOLD
+):
+    """Return (id, fact) of the stored fact most similar to text, or None.
+
+    Only facts in the same category whose word sets have a Jaccard similarity
+    of at least threshold count as near-duplicates. A fact and its negation
+    ("do not hold" vs "hold") differ by a word or two, so a candidate is only
+    a near-duplicate when both or neither contain a negation.
+    """
+    if not DEDUP_ENABLED:
+        return None
+    tokens = fact_tokens(text)
+    if not tokens:
+        return None
+
+    candidate_ids = (
+        select(DedupBucket.fact_id)
+        .where(DedupBucket.bucket.in_(lsh_buckets(category, tokens)))
+        .limit(MAX_CANDIDATES)
+        .scalar_subquery()
+    )
+    candidates = db.execute(
+        select(Fact.id, Fact.fact).where(Fact.id.in_(candidate_ids))
+    ).all()
+
+    best, best_score = None, threshold
+    for candidate in candidates:
+        candidate_tokens = fact_tokens(candidate.fact)
+        if negated(candidate_tokens) != negated(tokens):
+            continue
+        score = similarity(tokens, candidate_tokens)
+        if score >= best_score:
+            best, best_score = candidate, score
+    return best
+
+
+def index_fact(db: Session, fact: Fact) -> None:
+    """Add a flushed fact to the dedup index."""
+    if not DEDUP_ENABLED:
+        return
+    rows = _bucket_rows(fact.id, fact.category, fact.fact)
+    if rows:
+        _insert_sorted(db, rows)
+
+
+def index_fact_range(db: Session, first_id: int, batch_size: int = 5000) -> None:
+    """Add every fact with id >= first_id to the dedup index, e.g. after a bulk insert."""
+    if DEDUP_ENABLED:
+        _index_range(db, first_id, batch_size)
+
+
+def index_facts(
+    db: Session, facts: Iterable[tuple[int, str, str]], batch_size: int = 5000
+) -> None:
+    """Add inserted facts, given as (id, category, fact) tuples, to the dedup index.
+
+    For bulk inserts that know the ids they created: an id range could also
+    take in facts inserted at the same time, which are indexed already.
+    """
+    if DEDUP_ENABLED:
+        _index_rows(db, facts, batch_size)
+
+
+def _index_range(db: Session, first_id: int, batch_size: int) -> int:
+    facts = db.execute(
+        select(Fact.id, Fact.category, Fact.fact)
+        .where(Fact.id >= first_id)
+        .execution_options(yield_per=batch_size)
+    )
+    return _index_rows(db, facts, batch_size)
+
+
+def _index_rows(db: Session, facts: Iterable[tuple[int, str, str]], batch_size: int) -> int:
+    """Index the facts and return how many were indexed.
+
+    Facts with no content words get no buckets and are not counted.
+    """
+    rows = []
+    indexed = 0
+    for fact_id, category, text in facts:
+        buckets = _bucket_rows(fact_id, category, text)
+        if buckets:
+            rows.extend(buckets)
+            indexed += 1
+        if len(rows) >= batch_size * NUM_BANDS:
+            _insert_sorted(db, rows)
+            rows = []
+    if rows:
+        _insert_sorted(db, rows)
+    return indexed
+
+
+def _insert_sorted(db: Session, rows: list[dict]) -> None:
+    # Bucket keys are random, so inserting in key order keeps B-tree writes
+    # local. A Core insert skips the ORM's per-row bookkeeping.
+    rows.sort(key=lambda row: row["bucket"])
+    db.connection().execute(insert(DedupBucket.__table__), rows)
+
+
+def rebuild_dedup_index() -> int:
+    """Rebuild the dedup index from the facts table. Returns the number of facts indexed.
+
+    Runs even with DEDUP_ENABLED off, so the index can be prepared before
+    turning detection on. Facts with no content words (e.g. only stopwords)
+    are skipped and not counted.
+    """
+    db = SessionLocal()
+    try:
+        db.execute(delete(DedupBucket))
+        indexed = _index_range(db, 0, 5000)
+        db.commit()
+        return indexed
+    finally:
+        db.close()
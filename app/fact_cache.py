@@ -0,0 +1,112 @@
+"""In-process cache of fact text by fact id.
+
+Serving a fact only needs the database to choose ids; the text of popular facts
+(LLM-generated ones are served to many users) is then found here. The cache is
+an LRU bounded by FACT_CACHE_MAX_BYTES, counting each entry's string size plus
+a fixed per-entry overhead. Its total memory stays within that bound whatever
+the fact length, so longer facts mean fewer entries fit. It is shared by all
+threads of the process.
+
+Entries are dropped when a Fact is updated or deleted through the ORM. Bulk
+UPDATE or DELETE statements bypass those events and must call invalidate or
+clear themselves.
+"""
+import sys
+import threading
+from collections import OrderedDict
+from typing import Iterable
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from conf.env import FACT_CACHE_MAX_BYTES
+from models import Fact
+
+# Approximate bytes of bookkeeping per entry: the OrderedDict node, the key and
+# the size kept alongside the text
+ENTRY_OVERHEAD = 120
+
+
+class FactTextCache:
+    """Thread-safe LRU mapping of fact id to text, bounded in bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[int, tuple[str, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get_many(self, fact_ids: Iterable[int]) -> dict[int, str]:
+        """Return the cached texts among fact_ids, marking them recently used."""
+        found = {}
+        with self._lock:
+            for fact_id in fact_ids:
+                entry = self._entries.get(fact_id)
+                if entry is None:
+                    self.misses += 1
+                    continue
+                self._entries.move_to_end(fact_id)
+                found[fact_id] = entry[0]
+                self.hits += 1
+        return found
+
+    def put(self, fact_id: int, text: str) -> None:
+        size = sys.getsizeof(text) + ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(fact_id, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[fact_id] = (text, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+
+    def invalidate(self, fact_id: int) -> None:
+        with self._lock:
+            entry = self._entries.pop(fact_id, None)
+            if entry is not None:
+                self._bytes -= entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+fact_cache = FactTextCache(FACT_CACHE_MAX_BYTES)
+
+
+def fact_texts(db: Session, fact_ids: list[int]) -> dict[int, str]:
+    """Return {id: text} for fact_ids, reading only cache misses from the database."""
+    texts = fact_cache.get_many(fact_ids)
+    missing = [fact_id for fact_id in fact_ids if fact_id not in texts]
+    if missing:
+        rows = db.execute(select(Fact.id, Fact.fact).where(Fact.id.in_(missing)))
+        for fact_id, text in rows:
+            fact_cache.put(fact_id, text)
+            texts[fact_id] = text
+    return texts
+
+
+@event.listens_for(Fact, "after_update")
+@event.listens_for(Fact, "after_delete")
+def _invalidate_fact(mapper, connection, target: Fact) -> None:
+    fact_cache.invalidate(target.id)
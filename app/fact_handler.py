@@ -1,13 +1,45 @@
+import asyncio
+import functools
+import json
 import random
 import threading
 import time
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from langchain_core.messages import HumanMessage
-from typing import Literal
+from typing import Callable, Literal
 
-from app.facts import get_user_history, add_user_fact
-from app.agent import create_agent_state_graph
+from app import metrics
+from app.facts import (
+    VALID_CATEGORIES,
+    add_llm_facts,
+    get_facts_from_db,
+    get_user_history,
+    add_user_fact,
+    add_user_facts,
+    has_seen_fact,
+)
+from app.agent import agenerate_llm_facts, arun_agent, generate_llm_facts, run_agent
+from app.fact_cache import fact_cache
+from app.hedging import hedge_summary
+from app.llm_cache import cache_summary
+from app.prefetch import FactPrefetcher
+from app.resilience import LLMUnavailableError, breaker
 from app.schema import Fact
+from conf.database import unit_of_work
+from conf.env import (
+    KNOWN_FACTS_TOKEN_BUDGET,
+    KNOWN_FACTS_MAX_ITEMS,
+    LLM_FACTS_PER_CALL,
+    LLM_GENERATION_MODE,
+    PREFETCH_ENABLED,
+    PREFETCH_LOW_WATERMARK,
+    PREFETCH_HIGH_WATERMARK,
+    PREFETCH_MAX_CONCURRENCY,
+)
+
+_prefetcher: FactPrefetcher | None = None
+_db_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="facts-db")
 
 
 class LoadingAnimation:
@@ -46,61 +78,446 @@ class LoadingAnimation:
             self.thread.join()
 
 
-def retrieve_fact(
-    category: Literal["happy", "sad"] | None, user_id: int, show_animation: bool = False
-) -> str:
-    fact_sources = ["llm", "db"]
-    fact_source = random.choices(fact_sources, weights=[0.3, 0.7], k=1)[0]
+def _estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), independent of the model."""
+    return len(text) // 4 + 1
 
-    if not category:
-        category = random.choice(["happy", "sad"])
 
-    if fact_source == "db":
-        user_message = HumanMessage(
-            content=f"Tell me a {category} fact from the database."
-        )
-    else:
-        user_message = HumanMessage(content=f"Generate a {category} fact yourself.")
-
-    user_history = get_user_history(user_id=user_id)
-    shown_facts = "\n".join([f"- {shown_fact}" for shown_fact in user_history])
+def known_facts_context(
+    user_id: int,
+    token_budget: int = KNOWN_FACTS_TOKEN_BUDGET,
+    max_items: int = KNOWN_FACTS_MAX_ITEMS,
+) -> str:
+    """Build the "already told" block for the system prompt within a token budget.
 
-    agent = create_agent_state_graph(known_facts=shown_facts, user_id=user_id)
+    Only the most recent facts are included, newest first and deduplicated, so the
+    prompt stays the same size however long the user's history gets. Older facts
+    are still never repeated from the database, because the tools exclude
+    everything in user_facts.
+    """
+    lines = []
+    seen = set()
+    used = 0
+    for fact in get_user_history(user_id=user_id, limit=max_items):
+        key = " ".join(fact.lower().split())
+        if key in seen:
+            continue
+        line = f"- {fact}"
+        cost = _estimate_tokens(line)
+        if used + cost > token_budget:
+            break
+        seen.add(key)
+        used += cost
+        lines.append(line)
+    return "\n".join(lines)
 
-    # Show loading animation while invoking the agent (only for CLI)
-    if show_animation:
-        with LoadingAnimation("Loading some facts for you"):
-            result = agent.invoke({"messages": [user_message]})
-    else:
-        result = agent.invoke({"messages": [user_message]})
 
+def _fact_from_agent_result(result: dict) -> Fact | str:
+    """Parse the agent's final message into a Fact, or return its raw text."""
     # Extract the final message from the agent
     final_message = result["messages"][-1]
 
     # Parse the Fact response (should be JSON string from format_fact node)
     if isinstance(final_message.content, str):
         try:
-            import json
             fact_data = json.loads(final_message.content)
-            fact_obj = Fact(**fact_data)
+            return Fact(**fact_data)
         except (json.JSONDecodeError, Exception):
             # Fallback: return the raw content
             return str(final_message.content)
     elif isinstance(final_message.content, dict):
-        fact_obj = Fact(**final_message.content)
+        return Fact(**final_message.content)
     elif isinstance(final_message.content, Fact):
-        fact_obj = final_message.content
+        return final_message.content
+    # Fallback: return the raw content
+    return str(final_message.content)
+
+
+def _serve_from_db(category: str, user_id: int) -> str | None:
+    """Serve an unseen fact straight from the database, without the LLM.
+
+    Taking the fact out of the pool and recording it as seen share one
+    transaction. Returns None when the user has no unseen facts left in the
+    category.
+    """
+    with unit_of_work():
+        facts = get_facts_from_db(category, user_id, 1)
+        if not facts:
+            return None
+        add_user_fact(user_id=user_id, fact_id=facts[0]["fact_id"])
+        return facts[0]["fact_text"]
+
+
+def generate_llm_fact(category: str) -> dict:
+    """Have the agent generate and store a new fact that is not tied to a user."""
+    result = run_agent(
+        {
+            "messages": [
+                HumanMessage(content=f"Generate a {category} fact yourself.")
+            ],
+            # add_llm_fact does not attribute facts to a user, any id will do
+            "user_id": 0,
+            "known_facts": "",
+        },
+        # The input never changes, so a cached response would repeat one fact
+        cache=False,
+    )
+    fact_obj = _fact_from_agent_result(result)
+    if isinstance(fact_obj, str):
+        raise ValueError(f"Agent did not return a fact: {fact_obj}")
+    return fact_obj.model_dump()
+
+
+def generate_llm_batch(category: str) -> list[dict]:
+    """Generate LLM_FACTS_PER_CALL facts in one model call and store them all.
+
+    The facts are not tied to a user. Near-duplicates of stored facts are
+    dropped, so fewer facts, or none, may come back.
+    """
+    texts = generate_llm_facts(category, LLM_FACTS_PER_CALL, cache=False)
+    return add_llm_facts(category, texts)
+
+
+def start_prefetcher() -> None:
+    """Start pre-generating LLM facts in the background, if enabled.
+
+    Meant for long-lived sessions (shell, TUI); one-shot commands skip it.
+    """
+    global _prefetcher
+    if not PREFETCH_ENABLED or _prefetcher is not None:
+        return
+    if LLM_GENERATION_MODE == "agent":
+        generate, batch_size = generate_llm_fact, 1
     else:
-        # Fallback: return the raw content
-        return str(final_message.content)
+        generate, batch_size = generate_llm_batch, LLM_FACTS_PER_CALL
+    _prefetcher = FactPrefetcher(
+        generate,
+        VALID_CATEGORIES,
+        low_watermark=PREFETCH_LOW_WATERMARK,
+        high_watermark=PREFETCH_HIGH_WATERMARK,
+        max_concurrency=PREFETCH_MAX_CONCURRENCY,
+        batch_size=batch_size,
+    )
+    _prefetcher.start()
+
+
+def stop_prefetcher() -> None:
+    global _prefetcher
+    if _prefetcher is not None:
+        _prefetcher.stop()
+        _prefetcher = None
+
+
+def _serve_from_prefetch(category: str, user_id: int) -> str | None:
+    """Serve a pre-generated fact the user has not seen, if one is buffered."""
+    if _prefetcher is None:
+        return None
+    with unit_of_work():
+        fact = _prefetcher.take(
+            category, accept=lambda f: not has_seen_fact(user_id, f["fact_id"])
+        )
+        if fact is None:
+            return None
+        add_user_fact(user_id=user_id, fact_id=fact["fact_id"])
+        return fact["fact_text"]
+
+
+def _agent_input(category: str, user_id: int) -> dict:
+    user_message = HumanMessage(content=f"Generate a {category} fact yourself.")
+
+    shown_facts = known_facts_context(user_id)
+
+    return {
+        "messages": [user_message],
+        "user_id": user_id,
+        "known_facts": shown_facts,
+    }
+
+
+def _record_agent_result(result: dict, user_id: int, category: str) -> str:
+    """Record the fact the agent produced as seen and return its text."""
+    fact_obj = _fact_from_agent_result(result)
+    if isinstance(fact_obj, str):
+        return fact_obj
 
     # Check if this is an error fact (fact_id = -1 means no fact was found)
     if fact_obj.fact_id == -1:
         # Don't record error facts, just return the error message
         return fact_obj.fact_text
 
-    # Record that the user has seen this fact
-    add_user_fact(user_id=user_id, fact_id=fact_obj.fact_id)
+    with unit_of_work():
+        # add_llm_fact hands back the stored fact when the model repeats one;
+        # if the user was already told it, serve an unseen fact instead
+        if has_seen_fact(user_id, fact_obj.fact_id):
+            return _serve_from_db(category, user_id) or fact_obj.fact_text
+
+        # Record that the user has seen this fact
+        add_user_fact(user_id=user_id, fact_id=fact_obj.fact_id)
 
     # Return the fact text
     return fact_obj.fact_text
+
+
+def _serve_from_agent(
+    category: str,
+    user_id: int,
+    show_animation: bool = False,
+    on_text: Callable[[str], None] | None = None,
+) -> str:
+    """Have the agent generate a new fact, then record it as seen.
+
+    Like every route that exists to produce a new fact, it bypasses the LLM
+    response cache, which would replay the same sampled answer.
+    """
+    agent_input = _agent_input(category, user_id)
+
+    # Show loading animation while invoking the agent (only for CLI)
+    if show_animation:
+        with LoadingAnimation("Loading some facts for you"):
+            result = run_agent(agent_input, on_text, cache=False)
+    else:
+        result = run_agent(agent_input, on_text, cache=False)
+
+    return _record_agent_result(result, user_id, category)
+
+
+def _record_generated(texts: list[str], user_id: int, category: str) -> str:
+    """Store the facts from one generation call and serve the first to the user.
+
+    The rest are queued into every built unseen pool, the user's included, so
+    later requests are answered from the database. If every text turned out to
+    be a near-duplicate of a stored fact, an unseen stored fact is served instead.
+    A generated text is never returned without being stored and recorded as
+    seen, since its near-duplicate may be a fact the user has already seen.
+    """
+    with unit_of_work():
+        facts = add_llm_facts(category, texts)
+        if facts:
+            add_user_fact(user_id=user_id, fact_id=facts[0]["fact_id"])
+            return facts[0]["fact_text"]
+        fact_text = _serve_from_db(category, user_id)
+    if fact_text is not None:
+        return fact_text
+    if texts:
+        return f"Error: There are no new {category} facts left to show you."
+    return "Error: The AI assistant failed to retrieve a fact."
+
+
+def _serve_from_generation(
+    category: str,
+    user_id: int,
+    show_animation: bool = False,
+    on_text: Callable[[str], None] | None = None,
+) -> str:
+    """Generate several facts in one structured-output call and serve one of them."""
+    known_facts = known_facts_context(user_id)
+    if show_animation:
+        with LoadingAnimation("Loading some facts for you"):
+            texts = generate_llm_facts(
+                category, LLM_FACTS_PER_CALL, known_facts, on_text, cache=False
+            )
+    else:
+        texts = generate_llm_facts(
+            category, LLM_FACTS_PER_CALL, known_facts, on_text, cache=False
+        )
+    return _record_generated(texts, user_id, category)
+
+
+def _serve_fallback(category: str, user_id: int) -> str:
+    """Serve from the database because the LLM is unavailable."""
+    fact_text = _serve_from_db(category, user_id)
+    if fact_text is None:
+        return "Error: The AI assistant is unavailable and there are no unseen facts left."
+    metrics.increment("facts.route.fallback")
+    return fact_text
+
+
+def _serve_from_llm(
+    category: str,
+    user_id: int,
+    show_animation: bool = False,
+    on_text: Callable[[str], None] | None = None,
+) -> str:
+    if LLM_GENERATION_MODE == "agent":
+        return _serve_from_agent(category, user_id, show_animation, on_text)
+    return _serve_from_generation(category, user_id, show_animation, on_text)
+
+
+def _pick_route(category: str | None) -> tuple[str, str]:
+    """Choose the fact source (70% database, 30% LLM) and resolve a random category."""
+    fact_sources = ["llm", "db"]
+    fact_source = random.choices(fact_sources, weights=[0.3, 0.7], k=1)[0]
+
+    if not category:
+        category = random.choice(["happy", "sad"])
+
+    metrics.increment("facts.requests")
+    return fact_source, category
+
+
+def retrieve_fact(
+    category: Literal["happy", "sad"] | None,
+    user_id: int,
+    show_animation: bool = False,
+    on_text: Callable[[str], None] | None = None,
+) -> str:
+    """Serve the user a fact they have not seen and record it as seen.
+
+    When the fact has to be generated and on_text is given, the model's output
+    is streamed and on_text is called with the fact text so far as it grows,
+    so it can be shown before generation finishes. The returned text is the
+    fact actually recorded, which may differ (e.g. for a near-duplicate).
+    If the LLM is unavailable (errors, deadline, open circuit breaker), an
+    unseen fact from the database is served instead.
+    """
+    fact_source, category = _pick_route(category)
+
+    # Database facts need no generation, so they skip the LLM entirely. The LLM
+    # is only involved to generate facts, or when the pool is empty, and even
+    # then a fact pre-generated in the background is preferred.
+    if fact_source == "db":
+        start = time.perf_counter()
+        fact_text = _serve_from_db(category, user_id)
+        if fact_text is not None:
+            metrics.increment("facts.route.db")
+            metrics.observe("facts.latency.db", time.perf_counter() - start)
+            return fact_text
+        metrics.increment("facts.route.db_empty")
+
+    start = time.perf_counter()
+    fact_text = _serve_from_prefetch(category, user_id)
+    if fact_text is not None:
+        metrics.increment("facts.route.prefetch")
+        metrics.observe("facts.latency.prefetch", time.perf_counter() - start)
+        return fact_text
+
+    try:
+        with metrics.timer("facts.latency.llm"):
+            fact_text = _serve_from_llm(category, user_id, show_animation, on_text)
+    except LLMUnavailableError:
+        metrics.increment("facts.route.llm_unavailable")
+        return _serve_fallback(category, user_id)
+    metrics.increment("facts.route.llm")
+    return fact_text
+
+
+def retrieve_facts(
+    category: Literal["happy", "sad"] | None, user_id: int, n: int
+) -> list[dict]:
+    """Serve n facts at once and record them all as seen.
+
+    Unseen facts come from the database in one query. Any shortfall is generated
+    with a single LLM call that returns several facts. The new facts are stored
+    in one transaction, and all the user_facts rows are written in one bulk
+    insert. Returns dictionaries with fact_id, fact_text and category keys.
+    """
+    if not category:
+        category = random.choice(["happy", "sad"])
+
+    facts = get_facts_from_db(category, user_id, n)
+    from_db = len(facts)
+    texts = []
+    if from_db < n:
+        try:
+            texts = generate_llm_facts(
+                category, n - from_db, known_facts_context(user_id), cache=False
+            )
+        except LLMUnavailableError:
+            # Serve what the database had
+            metrics.increment("facts.route.llm_unavailable")
+
+    # The LLM call stays outside the transaction, so no lock is held meanwhile
+    with unit_of_work():
+        facts += add_llm_facts(category, texts)
+        add_user_facts(user_id, [f["fact_id"] for f in facts])
+
+    metrics.increment("facts.requests", len(facts))
+    metrics.increment("facts.route.db", from_db)
+    metrics.increment("facts.route.llm", len(facts) - from_db)
+    return [{**f, "category": category} for f in facts]
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run blocking database work on the dedicated executor, off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _db_executor, functools.partial(func, *args, **kwargs)
+    )
+
+
+async def aretrieve_fact(
+    category: Literal["happy", "sad"] | None,
+    user_id: int,
+    on_text: Callable[[str], None] | None = None,
+) -> str:
+    """Async version of retrieve_fact that never blocks the event loop.
+
+    Database work runs on a dedicated executor and the model is called with
+    ainvoke. Cancelling the awaiting task abandons the request: the model call
+    is cancelled, and any database call already in progress finishes on its
+    thread but its result is dropped.
+    """
+    fact_source, category = _pick_route(category)
+
+    if fact_source == "db":
+        start = time.perf_counter()
+        fact_text = await run_blocking(_serve_from_db, category, user_id)
+        if fact_text is not None:
+            metrics.increment("facts.route.db")
+            metrics.observe("facts.latency.db", time.perf_counter() - start)
+            return fact_text
+        metrics.increment("facts.route.db_empty")
+
+    start = time.perf_counter()
+    fact_text = await run_blocking(_serve_from_prefetch, category, user_id)
+    if fact_text is not None:
+        metrics.increment("facts.route.prefetch")
+        metrics.observe("facts.latency.prefetch", time.perf_counter() - start)
+        return fact_text
+
+    try:
+        with metrics.timer("facts.latency.llm"):
+            if LLM_GENERATION_MODE == "agent":
+                agent_input = await run_blocking(_agent_input, category, user_id)
+                result = await arun_agent(agent_input, on_text, cache=False)
+                fact_text = await run_blocking(
+                    _record_agent_result, result, user_id, category
+                )
+            else:
+                known_facts = await run_blocking(known_facts_context, user_id)
+                texts = await agenerate_llm_facts(
+                    category, LLM_FACTS_PER_CALL, known_facts, on_text, cache=False
+                )
+                fact_text = await run_blocking(
+                    _record_generated, texts, user_id, category
+                )
+    except LLMUnavailableError:
+        metrics.increment("facts.route.llm_unavailable")
+        return await run_blocking(_serve_fallback, category, user_id)
+    metrics.increment("facts.route.llm")
+    return fact_text
+
+
+def route_summary() -> dict:
+    """Share of fact requests served without the LLM, mean latency per route, LLM
+    availability and hedging, and fact cache and LLM response cache statistics.
+    """
+    requests = metrics.counter("facts.requests")
+    avoided = (
+        metrics.counter("facts.route.db")
+        + metrics.counter("facts.route.prefetch")
+        + metrics.counter("facts.route.fallback")
+    )
+    return {
+        "requests": requests,
+        "llm_avoided": avoided / requests if requests else 0.0,
+        "llm_unavailable": metrics.counter("facts.route.llm_unavailable"),
+        "llm_retries": metrics.counter("llm.retries"),
+        "breaker": breaker.state,
+        "db_latency": metrics.mean("facts.latency.db"),
+        "prefetch_latency": metrics.mean("facts.latency.prefetch"),
+        "llm_latency": metrics.mean("facts.latency.llm"),
+        "fact_cache": fact_cache.stats(),
+        "llm_cache": cache_summary(),
+        "hedging": hedge_summary(),
+    }
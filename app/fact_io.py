@@ -0,0 +1,198 @@
+"""Bulk import and export of the facts table as CSV or JSON lines.
+
+Both directions stream: import reads and writes one chunk at a time, and export
+reads through a server-side cursor. Apart from a 16-byte digest per fact kept
+to deduplicate imports, memory use does not depend on the size of the file or
+the table.
+"""
+import csv
+import hashlib
+import io
+import json
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, TextIO
+
+from sqlalchemy import column, false, insert, literal, select, table
+
+from conf.database import SessionLocal, engine
+from models import Fact
+from app.facts import VALID_CATEGORIES
+from app.dedup import index_facts
+from app.fact_pool import enqueue_facts
+
+FORMATS = ["csv", "jsonl"]
+
+
+def _normalize(text: str) -> bytes:
+    """Digest of the fact text ignoring case and whitespace, used for dedup."""
+    return hashlib.blake2b(
+        " ".join(text.lower().split()).encode(), digest_size=16
+    ).digest()
+
+
+def _read_rows(stream: TextIO, fmt: str) -> Iterator[dict]:
+    if fmt == "csv":
+        for row in csv.DictReader(stream):
+            yield row
+    else:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _chunks(rows: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _copy_facts(db, rows: list[dict]) -> list[int]:
+    """Insert rows with PostgreSQL COPY through the session's connection.
+
+    COPY returns no ids, so the rows are copied into a temporary table and
+    moved into facts with INSERT ... SELECT ... RETURNING. Returns the new ids
+    in row order.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for position, row in enumerate(rows):
+        writer.writerow([position, row["category"], row["fact"]])
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.execute(
+            "CREATE TEMPORARY TABLE import_facts "
+            "(position integer, category varchar, fact text) ON COMMIT DROP"
+        )
+        cursor.copy_expert(
+            "COPY import_facts (position, category, fact) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+    now = datetime.utcnow()
+    staged = table("import_facts", column("position"), column("category"), column("fact"))
+    inserted = db.execute(
+        insert(Fact)
+        .from_select(
+            ["category", "fact", "is_created_by_llm", "created_at", "updated_at"],
+            select(staged.c.category, staged.c.fact, false(), literal(now), literal(now))
+            .order_by(staged.c.position),
+        )
+        .returning(Fact.id)
+    )
+    # Ids come from the sequence in insertion order
+    return sorted(inserted.scalars())
+
+
+def import_facts(
+    stream: TextIO,
+    fmt: str,
+    batch_size: int = 5000,
+    progress: Callable[[int, int], None] | None = None,
+) -> tuple[int, int]:
+    """Import facts from a CSV or JSONL stream with category and fact columns.
+
+    Rows are inserted in transactions of batch_size rows, using COPY on
+    PostgreSQL and executemany elsewhere. Rows with an invalid category, or
+    whose normalized text already exists in the table or earlier in the file,
+    are skipped. Near-duplicates are not checked, to keep imports fast, but new
+    facts are added to the dedup index and queued into existing unseen pools.
+    progress is called after each committed batch with the running
+    (imported, skipped) totals, which are also returned.
+    """
+    use_copy = engine.dialect.name == "postgresql"
+    imported = skipped = 0
+
+    db = SessionLocal()
+    try:
+        known = {
+            _normalize(text)
+            for text in db.execute(
+                select(Fact.fact).execution_options(yield_per=batch_size)
+            ).scalars()
+        }
+
+        for chunk in _chunks(_read_rows(stream, fmt), batch_size):
+            rows = []
+            for row in chunk:
+                category = (row.get("category") or "").strip().lower()
+                text = (row.get("fact") or row.get("fact_text") or "").strip()
+                key = _normalize(text)
+                if category not in VALID_CATEGORIES or not text or key in known:
+                    skipped += 1
+                    continue
+                known.add(key)
+                rows.append({"category": category, "fact": text})
+
+            if rows:
+                # Only the ids this insert returned: a max-id range would also
+                # take in facts the app inserted meanwhile
+                if use_copy:
+                    ids = _copy_facts(db, rows)
+                else:
+                    ids = db.execute(
+                        insert(Fact).returning(Fact.id, sort_by_parameter_order=True),
+                        [{**row, "is_created_by_llm": False} for row in rows],
+                    ).scalars().all()
+                enqueue_facts(db, ids)
+                index_facts(
+                    db,
+                    ((id_, row["category"], row["fact"]) for id_, row in zip(ids, rows)),
+                    batch_size,
+                )
+                db.commit()
+                imported += len(rows)
+
+            if progress:
+                progress(imported, skipped)
+        return imported, skipped
+    finally:
+        db.close()
+
+
+def export_facts(
+    stream: TextIO,
+    fmt: str,
+    category: str | None = None,
+    batch_size: int = 5000,
+) -> int:
+    """Write facts to a CSV or JSONL stream, returning the number of rows written.
+
+    Rows are fetched in batches through a server-side cursor where the database
+    supports one, so memory stays constant however large the table is.
+    """
+    query = select(
+        Fact.id, Fact.category, Fact.fact, Fact.is_created_by_llm
+    ).order_by(Fact.id)
+    if category:
+        query = query.where(Fact.category == category)
+
+    fields = ["id", "category", "fact", "is_created_by_llm"]
+    writer = None
+    if fmt == "csv":
+        writer = csv.DictWriter(stream, fieldnames=fields)
+        writer.writeheader()
+
+    count = 0
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            query.execution_options(stream_results=True, yield_per=batch_size)
+        )
+        for row in result:
+            record = dict(zip(fields, row))
+            if writer:
+                writer.writerow(record)
+            else:
+                stream.write(json.dumps(record) + "\n")
+            count += 1
+        return count
+    finally:
+        db.close()
@@ -0,0 +1,242 @@
+"""Precomputed per-(user, category) pools of facts the user has not seen yet.
+
+A pool is built the first time a user asks for a fact in a category and is then
+kept up to date as facts are added and served, so picking the next fact is a
+single indexed lookup instead of recomputing "unseen" from scratch.
+"""
+from datetime import datetime
+
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from conf.database import SessionLocal
+from models import Fact, FactPool, UnseenFact, UserFact
+
+# Fact ids per statement in enqueue_facts
+ENQUEUE_SLICE = 1000
+
+
+def unseen_facts_query(db: Session, category: str, user_id: int | None):
+    """Build a query over the ids of the facts in a category the user has not seen.
+
+    Facts created by the user are excluded; LLM-generated facts (user_id is None)
+    are always included. The seen-check is a NOT EXISTS anti-join against
+    user_facts, so nothing is loaded into Python to filter.
+    """
+    query = db.query(Fact.id).filter(Fact.category == category)
+    if user_id is not None:
+        seen = (
+            db.query(UserFact.id)
+            .filter(UserFact.user_id == user_id, UserFact.fact_id == Fact.id)
+            .exists()
+        )
+        query = query.filter(
+            (Fact.user_id != user_id) | (Fact.user_id == None),
+            ~seen,
+        )
+    return query
+
+
+def build_pool(db: Session, user_id: int, category: str) -> None:
+    """(Re)build the unseen pool for a user and category in the current transaction."""
+    db.query(UnseenFact).filter(
+        UnseenFact.user_id == user_id, UnseenFact.category == category
+    ).delete(synchronize_session=False)
+
+    unseen = unseen_facts_query(db, category, user_id).with_entities(
+        literal(user_id), literal(category), Fact.id, func.random()
+    )
+    db.execute(
+        insert(UnseenFact).from_select(
+            ["user_id", "category", "fact_id", "sort_key"], unseen
+        )
+    )
+
+    pool = (
+        db.query(FactPool)
+        .filter(FactPool.user_id == user_id, FactPool.category == category)
+        .first()
+    )
+    if pool is None:
+        db.add(FactPool(user_id=user_id, category=category))
+    else:
+        pool.built_at = datetime.utcnow()
+
+
+def next_unseen_fact(db: Session, user_id: int, category: str) -> int | None:
+    """Return the id of the next fact in the user's pool, or None if it is empty.
+
+    The pool is built on first use, in the caller's transaction. The entry stays
+    at the head of the queue until the fact is recorded as seen, which removes it.
+    """
+    facts = next_unseen_facts(db, user_id, category, 1)
+    return facts[0] if facts else None
+
+
+def next_unseen_facts(db: Session, user_id: int, category: str, limit: int) -> list[int]:
+    """Return up to limit fact ids from the head of the user's pool.
+
+    Only the pool is read; fact text comes from app.fact_cache.
+    """
+    _ensure_pool(db, user_id, category)
+    return [
+        fact_id
+        for (fact_id,) in db.query(UnseenFact.fact_id)
+        .filter(UnseenFact.user_id == user_id, UnseenFact.category == category)
+        .order_by(UnseenFact.sort_key)
+        .limit(limit)
+    ]
+
+
+def claim_unseen_facts(db: Session, user_id: int, category: str, limit: int) -> list[int]:
+    """Take up to limit fact ids off the head of the user's pool.
+
+    The entries are picked and deleted in one DELETE ... RETURNING, so
+    concurrent requests for the same user never get the same fact (on
+    PostgreSQL, FOR UPDATE SKIP LOCKED makes them take the next ones instead of
+    waiting). The caller must record the facts as seen in the same transaction;
+    if it rolls back, they go back into the pool.
+    """
+    _ensure_pool(db, user_id, category)
+    head = (
+        select(UnseenFact.id)
+        .where(UnseenFact.user_id == user_id, UnseenFact.category == category)
+        .order_by(UnseenFact.sort_key)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    claimed = db.execute(
+        delete(UnseenFact)
+        .where(UnseenFact.id.in_(head.scalar_subquery()))
+        .returning(UnseenFact.fact_id, UnseenFact.sort_key)
+    ).all()
+    return [fact_id for fact_id, _ in sorted(claimed, key=lambda row: row.sort_key)]
+
+
+def _ensure_pool(db: Session, user_id: int, category: str) -> None:
+    has_pool = (
+        db.query(FactPool.id)
+        .filter(FactPool.user_id == user_id, FactPool.category == category)
+        .first()
+    )
+    if not has_pool:
+        build_pool(db, user_id, category)
+        db.flush()
+
+
+def enqueue_fact(db: Session, fact: Fact) -> None:
+    """Add a newly inserted fact to every built pool of its category.
+
+    The fact must already be flushed so that it has an id. The creator's own pool
+    is skipped, matching the rule that users are not served their own facts.
+    """
+    pools = select(
+        FactPool.user_id, FactPool.category, literal(fact.id), func.random()
+    ).where(FactPool.category == fact.category)
+    if fact.user_id is not None:
+        pools = pools.where(FactPool.user_id != fact.user_id)
+    db.execute(
+        insert(UnseenFact).from_select(
+            ["user_id", "category", "fact_id", "sort_key"], pools
+        )
+    )
+
+
+def enqueue_facts(db: Session, fact_ids: list[int]) -> None:
+    """Add newly inserted facts to the built pools of their category.
+
+    Used after bulk inserts, where calling enqueue_fact per row would be too slow.
+    The ids are those the insert returned: an id range could also take in facts
+    inserted at the same time, which may already have been served. Facts
+    already queued for a user are skipped.
+    """
+    queued = (
+        select(UnseenFact.id)
+        .where(UnseenFact.user_id == FactPool.user_id, UnseenFact.fact_id == Fact.id)
+        .exists()
+    )
+    # Slices keep the IN list within the database's bound parameter limit
+    for start in range(0, len(fact_ids), ENQUEUE_SLICE):
+        pools = (
+            select(FactPool.user_id, FactPool.category, Fact.id, func.random())
+            .join(Fact, Fact.category == FactPool.category)
+            .where(
+                Fact.id.in_(fact_ids[start:start + ENQUEUE_SLICE]),
+                (Fact.user_id == None) | (Fact.user_id != FactPool.user_id),
+                ~queued,
+            )
+        )
+        db.execute(
+            insert(UnseenFact).from_select(
+                ["user_id", "category", "fact_id", "sort_key"], pools
+            )
+        )
+
+
+def mark_seen(db: Session, user_id: int, *fact_ids: int) -> None:
+    """Drop facts from the user's pool once they have been served."""
+    db.query(UnseenFact).filter(
+        UnseenFact.user_id == user_id, UnseenFact.fact_id.in_(fact_ids)
+    ).delete(synchronize_session=False)
+
+
+def rebuild_pools() -> int:
+    """Rebuild every pool, creating one per (user, category) seen in user_facts.
+
+    Intended for existing databases and after bulk changes. Returns the number of
+    pools rebuilt.
+    """
+    db = SessionLocal()
+    try:
+        existing = {
+            (p.user_id, p.category)
+            for p in db.query(FactPool.user_id, FactPool.category)
+        }
+        served = {
+            (r.user_id, r.category)
+            for r in db.query(UserFact.user_id, Fact.category)
+            .join(Fact, Fact.id == UserFact.fact_id)
+            .distinct()
+        }
+        targets = sorted(existing | served)
+        for user_id, category in targets:
+            build_pool(db, user_id, category)
+        db.commit()
+        return len(targets)
+    finally:
+        db.close()
+
+
+def check_pools(repair: bool = False) -> int:
+    """Count pool entries that contradict user_facts or the no-own-facts rule.
+
+    A fact already present in user_facts for a user must never be in that user's
+    pool, otherwise serving it would violate the uix_user_fact constraint. The
+    same goes for facts the user created themselves. With repair=True the
+    offending entries are deleted. Returns the number of entries found.
+    """
+    db = SessionLocal()
+    try:
+        seen = (
+            db.query(UserFact.id)
+            .filter(
+                UserFact.user_id == UnseenFact.user_id,
+                UserFact.fact_id == UnseenFact.fact_id,
+            )
+            .exists()
+        )
+        own = (
+            db.query(Fact.id)
+            .filter(Fact.id == UnseenFact.fact_id, Fact.user_id == UnseenFact.user_id)
+            .exists()
+        )
+        bad = db.query(UnseenFact.id).filter(seen | own)
+        count = bad.count()
+        if repair and count:
+            db.query(UnseenFact).filter(
+                UnseenFact.id.in_(bad.scalar_subquery())
+            ).delete(synchronize_session=False)
+            db.commit()
+        return count
+    finally:
+        db.close()
@@ -1,26 +1,46 @@
-import random
-from typing import List, Literal
+from datetime import datetime
+from typing import Iterator, List, Literal, NamedTuple
 
-from conf.database import SessionLocal
+from sqlalchemy import func, insert
+
+from conf.database import unit_of_work
 from models import Fact, UserFact
+from app.dedup import find_near_duplicate, index_fact
+from app.fact_cache import fact_texts
+from app.fact_pool import (
+    claim_unseen_facts,
+    enqueue_fact,
+    mark_seen,
+    next_unseen_fact,
+)
 
 VALID_CATEGORIES = ["happy", "sad"]
 
+# Outcomes of add_fact
+ADDED = "added"
+DUPLICATE = "duplicate"
+INVALID_CATEGORY = "invalid_category"
+
+
+def add_fact(category: str, fact_text: str, user_id: int) -> str:
+    """Add a user's fact unless it is a near-duplicate of a stored one.
 
-def add_fact(category: str, fact_text: str, user_id: int) -> bool:
+    Returns ADDED, DUPLICATE or INVALID_CATEGORY.
+    """
     category = category.lower()
     if category not in VALID_CATEGORIES:
-        return False
-    db = SessionLocal()
-    try:
+        return INVALID_CATEGORY
+    with unit_of_work() as db:
+        if find_near_duplicate(db, category, fact_text) is not None:
+            return DUPLICATE
         f = Fact(
             category=category, fact=fact_text, user_id=user_id, is_created_by_llm=False
         )
         db.add(f)
-        db.commit()
-        return True
-    finally:
-        db.close()
+        db.flush()
+        enqueue_fact(db, f)
+        index_fact(db, f)
+        return ADDED
 
 
 def add_llm_fact(category: Literal["happy", "sad"], fact_text: str, user_id: int | str) -> dict:
@@ -32,7 +52,8 @@ def add_llm_fact(category: Literal["happy", "sad"], fact_text: str, user_id: int
         user_id: The ID of the user requesting the fact (required for tool binding, can be string or int)
 
     Returns:
-        A dictionary with fact_id and fact_text keys
+        A dictionary with fact_id and fact_text keys. If a near-duplicate is
+        already stored, that fact is returned instead of adding a new one.
     """
     # Convert user_id to int if it's a string (LLM sometimes passes it as string)
     if isinstance(user_id, str):
@@ -41,17 +62,44 @@ def add_llm_fact(category: Literal["happy", "sad"], fact_text: str, user_id: int
     category = category.lower()
     if category not in VALID_CATEGORIES:
         return {"fact_id": -1, "fact_text": f"Invalid category: {category}"}
-    db = SessionLocal()
-    try:
+    with unit_of_work() as db:
+        existing = find_near_duplicate(db, category, fact_text)
+        if existing is not None:
+            return {"fact_id": existing.id, "fact_text": existing.fact}
         fact = Fact(
             category=category, fact=fact_text, user_id=None, is_created_by_llm=True
         )
         db.add(fact)
-        db.commit()
-        db.refresh(fact)
+        db.flush()
+        enqueue_fact(db, fact)
+        index_fact(db, fact)
         return {"fact_id": fact.id, "fact_text": fact.fact}
-    finally:
-        db.close()
+
+
+def add_llm_facts(category: str, fact_texts: List[str]) -> List[dict]:
+    """Add several LLM-generated facts in one transaction.
+
+    Texts that are near-duplicates of a stored fact, or of an earlier text in
+    the same call, are skipped. Returns a list of dictionaries with fact_id and
+    fact_text keys for the facts that were added.
+    """
+    category = category.lower()
+    if category not in VALID_CATEGORIES:
+        return []
+    with unit_of_work() as db:
+        facts = []
+        for text in fact_texts:
+            if find_near_duplicate(db, category, text) is not None:
+                continue
+            fact = Fact(category=category, fact=text, user_id=None, is_created_by_llm=True)
+            db.add(fact)
+            db.flush()
+            # Indexed right away so later texts in the batch are checked against it
+            index_fact(db, fact)
+            facts.append(fact)
+        for fact in facts:
+            enqueue_fact(db, fact)
+        return [{"fact_id": f.id, "fact_text": f.fact} for f in facts]
 
 
 def get_fact_from_db(
@@ -70,35 +118,27 @@ def get_fact_from_db(
     if isinstance(user_id, str):
         user_id = int(user_id)
 
-    db = SessionLocal()
-    try:
-        # Exclude facts created by the user
-        query = db.query(Fact).filter(Fact.category == category)
-        if user_id is not None:
-            # Exclude facts created by this user, but include LLM-generated facts (user_id is None)
-            query = query.filter((Fact.user_id != user_id) | (Fact.user_id == None))
-
-        # Get all facts that match the category
-        all_facts = query.all()
-
-        # Get IDs of facts the user has already seen
-        seen_fact_ids = set()
-        if user_id is not None:
-            seen_facts = (
-                db.query(UserFact.fact_id).filter(UserFact.user_id == user_id).all()
-            )
-            seen_fact_ids = {f.fact_id for f in seen_facts}
+    with unit_of_work() as db:
+        fact_id = next_unseen_fact(db, user_id, category)
+        if fact_id is None:
+            return {"fact_id": -1, "fact_text": f"No {category} facts yet."}
 
-        # Filter out already seen facts
-        unseen_facts = [f for f in all_facts if f.id not in seen_fact_ids]
+        return {"fact_id": fact_id, "fact_text": fact_texts(db, [fact_id])[fact_id]}
 
-        if not unseen_facts:
-            return {"fact_id": -1, "fact_text": f"No {category} facts yet."}
 
-        chosen_fact = random.choice(unseen_facts)
-        return {"fact_id": chosen_fact.id, "fact_text": chosen_fact.fact}
-    finally:
-        db.close()
+def get_facts_from_db(category: str, user_id: int, n: int) -> List[dict]:
+    """Retrieve up to n unseen facts from the category, to be served to the user.
+
+    The ids are taken out of the user's pool in one statement, so concurrent
+    requests get different facts; record them as seen with add_user_facts,
+    ideally in the same unit of work. The texts come from the fact cache, with a
+    single query for any that are not cached. Returns a list of dictionaries
+    with fact_id and fact_text keys.
+    """
+    with unit_of_work() as db:
+        fact_ids = claim_unseen_facts(db, user_id, category, n)
+        texts = fact_texts(db, fact_ids)
+        return [{"fact_id": i, "fact_text": texts[i]} for i in fact_ids]
 
 
 def add_user_fact(user_id: int, fact_id: int) -> None:
@@ -108,25 +148,106 @@ def add_user_fact(user_id: int, fact_id: int) -> None:
         user_id: The ID of the user
         fact_id: The ID of the fact
     """
-    db = SessionLocal()
-    try:
+    with unit_of_work() as db:
         uf = UserFact(user_id=user_id, fact_id=fact_id)
         db.add(uf)
-        db.commit()
-    finally:
-        db.close()
+        db.flush()
+        mark_seen(db, user_id, fact_id)
+
+
+def add_user_facts(user_id: int, fact_ids: List[int]) -> None:
+    """Record that a user has seen several facts, in one bulk insert."""
+    if not fact_ids:
+        return
+    with unit_of_work() as db:
+        db.execute(
+            insert(UserFact),
+            [{"user_id": user_id, "fact_id": fact_id} for fact_id in fact_ids],
+        )
+        mark_seen(db, user_id, *fact_ids)
 
 
-def get_user_history(user_id: int) -> List[str]:
-    db = SessionLocal()
-    try:
-        rows = (
-            db.query(Fact.fact)
-            .join(UserFact, Fact.id == UserFact.fact_id)
+def has_seen_fact(user_id: int, fact_id: int) -> bool:
+    with unit_of_work() as db:
+        seen = (
+            db.query(UserFact.id)
+            .filter(UserFact.user_id == user_id, UserFact.fact_id == fact_id)
+            .first()
+        )
+        return seen is not None
+
+
+class HistoryEntry(NamedTuple):
+    fact_id: int
+    fact: str
+    seen_at: datetime
+
+    @property
+    def cursor(self) -> tuple[datetime, int]:
+        """Pass as before= to continue the history after this entry."""
+        return (self.seen_at, self.fact_id)
+
+
+def get_user_history_page(
+    user_id: int, limit: int, before: tuple[datetime, int] | None = None
+) -> List[HistoryEntry]:
+    """Return up to limit history entries, newest first, after the before cursor.
+
+    Keyset pagination on (created_at DESC, fact_id), the order of the
+    ix_user_facts_history index, so every page is one index range read no
+    matter how deep into the history it is.
+    """
+    with unit_of_work() as db:
+        query = (
+            db.query(UserFact.fact_id, Fact.fact, UserFact.created_at)
+            .join(Fact, Fact.id == UserFact.fact_id)
             .filter(UserFact.user_id == user_id)
-            .order_by(UserFact.created_at.desc())
+        )
+        if before is not None:
+            seen_at, fact_id = before
+            query = query.filter(
+                UserFact.created_at <= seen_at,
+                (UserFact.created_at < seen_at) | (UserFact.fact_id > fact_id),
+            )
+        rows = (
+            query.order_by(UserFact.created_at.desc(), UserFact.fact_id)
+            .limit(limit)
             .all()
         )
-        return [r.fact for r in rows]
-    finally:
-        db.close()
+        return [HistoryEntry(*row) for row in rows]
+
+
+def iter_user_history(
+    user_id: int,
+    limit: int | None = None,
+    before: tuple[datetime, int] | None = None,
+    page_size: int = 500,
+) -> Iterator[HistoryEntry]:
+    """Stream a user's history, newest first, fetching page_size rows at a time.
+
+    No session is held open between pages, so the caller may consume the
+    generator as slowly as it likes.
+    """
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = page_size if remaining is None else min(page_size, remaining)
+        page = get_user_history_page(user_id, size, before)
+        yield from page
+        if len(page) < size:
+            return
+        before = page[-1].cursor
+        if remaining is not None:
+            remaining -= len(page)
+
+
+def count_user_history(user_id: int) -> int:
+    with unit_of_work() as db:
+        return (
+            db.query(func.count(UserFact.id))
+            .filter(UserFact.user_id == user_id)
+            .scalar()
+        )
+
+
+def get_user_history(user_id: int, limit: int | None = None) -> List[str]:
+    return [entry.fact for entry in iter_user_history(user_id, limit)]
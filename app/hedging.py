@@ -0,0 +1,280 @@
+"""Hedged model calls across several OpenAI-compatible providers.
+
+LLM_PROVIDERS lists the endpoints in order of preference. A call goes to the
+primary first; if it has not answered within the primary's hedge delay (its
+LLM_HEDGE_PERCENTILE latency), the same request is also sent to the next
+provider, and so on down the list, and the first successful answer wins. A
+provider that fails hands over to the next one at once. The other calls are
+cancelled: async ones outright, while sync ones run on in their daemon thread
+(so they never hold up exit) and their result is dropped.
+
+Each provider keeps a LatencyHistogram of its recent answers, so hedge delays
+follow the providers as they get faster or slower. A call that loses counts
+with its hedge delay, the latency it is known to have exceeded: counting the
+whole time it ran would raise the delay after every hedge, until hedging
+stopped. Only the primary's call runs in the caller's context, so LangGraph's
+streaming and tracing callbacks see that call alone and hedges run without them.
+"""
+import asyncio
+import bisect
+import contextvars
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Awaitable, Callable, TypeVar
+
+from app import metrics
+from conf.env import (
+    LLM,
+    LLM_API_KEY,
+    LLM_BASE_URL,
+    LLM_HEDGE_DELAY,
+    LLM_HEDGE_ENABLED,
+    LLM_HEDGE_MIN_DELAY,
+    LLM_HEDGE_MIN_SAMPLES,
+    LLM_HEDGE_PERCENTILE,
+    LLM_PROVIDER_API_KEYS,
+    LLM_PROVIDERS,
+)
+
+T = TypeVar("T")
+
+
+class LatencyHistogram:
+    """Latencies in log-spaced buckets, halved every half_life observations.
+
+    The halving makes the histogram forget old latencies gradually, so its
+    percentiles track a provider whose speed changes.
+    """
+
+    # 10 ms to about 6 minutes in steps of 25%
+    BOUNDS = tuple(0.01 * 1.25**i for i in range(48))
+
+    def __init__(self, half_life: int = 100):
+        self.half_life = half_life
+        self.samples = 0
+        self._counts = [0.0] * (len(self.BOUNDS) + 1)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        bucket = bisect.bisect_left(self.BOUNDS, seconds)
+        with self._lock:
+            self._counts[bucket] += 1
+            self.samples += 1
+            if self.samples % self.half_life == 0:
+                self._counts = [count / 2 for count in self._counts]
+
+    def percentile(self, p: float) -> float | None:
+        """Upper bound of the bucket holding the p-th percentile, or None if empty."""
+        with self._lock:
+            total = sum(self._counts)
+            if not total:
+                return None
+            target = total * p / 100
+            seen = 0.0
+            for bucket, count in enumerate(self._counts):
+                seen += count
+                if count and seen >= target:
+                    break
+        return self.BOUNDS[min(bucket, len(self.BOUNDS) - 1)]
+
+
+class Provider:
+    """One OpenAI-compatible endpoint and model, with its latency histogram."""
+
+    def __init__(
+        self, model: str | None, base_url: str | None, api_key: str | None, primary: bool
+    ):
+        self.model = model
+        self.base_url = base_url
+        self.api_key = api_key
+        self.primary = primary
+        self.latencies = LatencyHistogram()
+
+    @property
+    def name(self) -> str:
+        return f"{self.model}@{self.base_url or 'default'}"
+
+    @property
+    def model_kwargs(self) -> dict:
+        """Keyword arguments selecting this provider's chat model in app.agent."""
+        return {"model": self.model, "base_url": self.base_url, "api_key": self.api_key}
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait for this provider before hedging to the next one."""
+        if self.latencies.samples < LLM_HEDGE_MIN_SAMPLES:
+            return LLM_HEDGE_DELAY
+        return max(LLM_HEDGE_MIN_DELAY, self.latencies.percentile(LLM_HEDGE_PERCENTILE))
+
+    def __repr__(self) -> str:
+        return f"Provider({self.name!r})"
+
+
+def parse_providers(spec: str, api_keys: str = "") -> list[Provider]:
+    """Providers from comma-separated model@base_url entries, LLM at LLM_BASE_URL if none.
+
+    The API keys are comma-separated in the same order; a missing one is LLM_API_KEY.
+    """
+    entries = [entry.strip() for entry in spec.split(",") if entry.strip()]
+    if not entries:
+        return [Provider(LLM, LLM_BASE_URL, LLM_API_KEY, primary=True)]
+    keys = [key.strip() for key in api_keys.split(",")]
+    providers = []
+    for index, entry in enumerate(entries):
+        model, _, base_url = entry.partition("@")
+        api_key = keys[index] if index < len(keys) and keys[index] else LLM_API_KEY
+        providers.append(Provider(model or LLM, base_url or None, api_key, primary=index == 0))
+    return providers
+
+
+PROVIDERS = parse_providers(LLM_PROVIDERS, LLM_PROVIDER_API_KEYS)
+
+
+def primary() -> Provider:
+    return PROVIDERS[0]
+
+
+def _candidates() -> list[Provider]:
+    return PROVIDERS if LLM_HEDGE_ENABLED else PROVIDERS[:1]
+
+
+def _context(provider: Provider) -> contextvars.Context:
+    # Hedges run without the caller's callbacks, so they stream nothing
+    return contextvars.copy_context() if provider.primary else contextvars.Context()
+
+
+def _record_winner(provider: Provider, seconds: float) -> None:
+    provider.latencies.observe(seconds)
+    if not provider.primary:
+        metrics.increment("llm.hedge.won")
+
+
+def _start(provider: Provider, call: Callable[[Provider, float], T], timeout: float) -> Future:
+    """Run call(provider, timeout) in a daemon thread, in the provider's context."""
+    future = Future()
+    context = _context(provider)
+
+    def run():
+        if future.set_running_or_notify_cancel():
+            try:
+                future.set_result(context.run(call, provider, timeout))
+            except BaseException as error:
+                future.set_exception(error)
+
+    threading.Thread(target=run, name="llm-hedge", daemon=True).start()
+    return future
+
+
+def hedged(call: Callable[[Provider, float], T], timeout: float) -> T:
+    """Return call(provider, timeout) of the first provider to answer.
+
+    call should pass timeout on as the request timeout; hedges sent later get
+    what is left of it. When every provider fails, the first error is raised.
+    """
+    providers = _candidates()
+    start = time.monotonic()
+    if len(providers) == 1:
+        result = call(providers[0], timeout)
+        _record_winner(providers[0], time.monotonic() - start)
+        return result
+
+    sent: dict[Future, tuple[Provider, float, float]] = {}
+    pending: set[Future] = set()
+    errors = []
+    hedge_at = start
+    try:
+        while True:
+            now = time.monotonic()
+            if len(sent) < len(providers) and (now >= hedge_at or not pending):
+                provider = providers[len(sent)]
+                if sent:
+                    metrics.increment("llm.hedge.sent")
+                remaining = max(0.0, timeout - (now - start))
+                future = _start(provider, call, remaining)
+                delay = provider.hedge_delay()
+                sent[future] = (provider, now, delay)
+                pending.add(future)
+                hedge_at = now + delay
+            if not pending:
+                raise errors[0]
+            # Once every provider has the call, their own timeouts end the wait
+            wait_for = max(0.0, hedge_at - now) if len(sent) < len(providers) else None
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                provider, sent_at, _ = sent[future]
+                error = future.exception()
+                if error is None:
+                    _record_winner(provider, time.monotonic() - sent_at)
+                    return future.result()
+                errors.append(error)
+    finally:
+        for future in pending:
+            provider, sent_at, delay = sent[future]
+            if not future.cancel():
+                provider.latencies.observe(min(delay, time.monotonic() - sent_at))
+
+
+async def ahedged(call: Callable[[Provider, float], Awaitable[T]], timeout: float) -> T:
+    """Async variant of hedged; the calls that lose are cancelled."""
+    providers = _candidates()
+    start = time.monotonic()
+    if len(providers) == 1:
+        result = await call(providers[0], timeout)
+        _record_winner(providers[0], time.monotonic() - start)
+        return result
+
+    sent: dict[asyncio.Task, tuple[Provider, float, float]] = {}
+    pending: set[asyncio.Task] = set()
+    errors = []
+    hedge_at = start
+    try:
+        while True:
+            now = time.monotonic()
+            if len(sent) < len(providers) and (now >= hedge_at or not pending):
+                provider = providers[len(sent)]
+                if sent:
+                    metrics.increment("llm.hedge.sent")
+                remaining = max(0.0, timeout - (now - start))
+                task = asyncio.create_task(
+                    call(provider, remaining), context=_context(provider)
+                )
+                delay = provider.hedge_delay()
+                sent[task] = (provider, now, delay)
+                pending.add(task)
+                hedge_at = now + delay
+            if not pending:
+                raise errors[0]
+            wait_for = max(0.0, hedge_at - now) if len(sent) < len(providers) else None
+            done, pending = await asyncio.wait(
+                pending, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                provider, sent_at, _ = sent[task]
+                error = task.exception()
+                if error is None:
+                    _record_winner(provider, time.monotonic() - sent_at)
+                    return task.result()
+                errors.append(error)
+    finally:
+        for task in pending:
+            provider, sent_at, delay = sent[task]
+            task.cancel()
+            provider.latencies.observe(min(delay, time.monotonic() - sent_at))
+
+
+def hedge_summary() -> dict:
+    """Hedges sent and won, and each provider's latency percentiles and hedge delay."""
+    return {
+        "enabled": LLM_HEDGE_ENABLED and len(PROVIDERS) > 1,
+        "hedges": metrics.counter("llm.hedge.sent"),
+        "hedge_wins": metrics.counter("llm.hedge.won"),
+        "providers": {
+            provider.name: {
+                "samples": provider.latencies.samples,
+                "p50": provider.latencies.percentile(50),
+                "p95": provider.latencies.percentile(95),
+                "hedge_delay": provider.hedge_delay(),
+            }
+            for provider in PROVIDERS
+        },
+    }
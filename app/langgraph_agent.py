@@ -1,4 +1,6 @@
-from app.agent import create_agent_state_graph
+from app.agent import get_agent_graph
 
 
-agent = create_agent_state_graph(known_facts="", user_id=1)
+# Studio shows the state schema as the input form: set user_id (and optionally
+# known_facts) alongside the messages.
+agent = get_agent_graph()
@@ -0,0 +1,226 @@
+"""Cache of LLM responses keyed by the normalized model input.
+
+Identical inputs recur: the LangGraph Studio graph is usually run with
+known_facts "", and direct callers of the fact writer often pass the same empty
+"already told" context. Routes that generate new facts for users bypass the
+cache (cache=False), since a replayed answer is not a new fact, and calls
+sampled at temperature > 0 are only cached with LLM_CACHE_SAMPLED.
+
+The cache is off by default. The models are sampled at temperature 0.7, so
+it only stores anything with LLM_CACHE set to a backend and
+LLM_CACHE_SAMPLED=true, and then only for Studio runs and direct callers.
+
+A response is stored under a SHA-256 of the model settings, the messages
+(system prompt included, whitespace collapsed, message and tool call ids
+dropped) and the schema of the bound tools or structured output, so any change
+to the prompt or the tools makes a new key.
+
+Two backends share the get/put/clear interface: MemoryResponseCache, an LRU in
+the process, and SQLiteResponseCache, a file shared by all processes and kept
+across runs. Entries expire after LLM_CACHE_TTL seconds and the least recently
+used are evicted beyond LLM_CACHE_MAX_ENTRIES. Hits, misses and the model time
+each hit saved are recorded in app.metrics under llm.cache.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from app import metrics
+from conf.env import (
+    LLM_CACHE,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_PATH,
+    LLM_CACHE_SAMPLED,
+    LLM_CACHE_TTL,
+)
+
+
+class MemoryResponseCache:
+    """Thread-safe LRU of responses with a time to live."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # key -> (value, latency, expires_at)
+        self._entries: OrderedDict[str, tuple[str, float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> tuple[str, float] | None:
+        """Return (value, latency of the call that produced it), or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[2] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0], entry[1]
+
+    def put(self, key: str, value: str, latency: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, latency, time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteResponseCache:
+    """Responses in a SQLite file, with the same expiry and LRU bound."""
+
+    def __init__(self, path: str, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        path = Path(path).expanduser()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, latency REAL NOT NULL,"
+            " expires_at REAL NOT NULL, used_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_llm_responses_used_at ON llm_responses (used_at)"
+        )
+
+    def get(self, key: str) -> tuple[str, float] | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, latency FROM llm_responses WHERE key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE llm_responses SET used_at = ? WHERE key = ?", (now, key)
+                )
+        return row
+
+    def put(self, key: str, value: str, latency: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses VALUES (?, ?, ?, ?, ?)",
+                (key, value, latency, now + self.ttl, now),
+            )
+            self._conn.execute(
+                "DELETE FROM llm_responses WHERE expires_at <= ? OR key IN ("
+                " SELECT key FROM llm_responses ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (now, self.max_entries),
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_responses")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM llm_responses").fetchone()[0]
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> MemoryResponseCache | SQLiteResponseCache | None:
+    """Return the process-wide response cache configured by LLM_CACHE, or None."""
+    global _cache
+    if _cache is None and LLM_CACHE in ("memory", "sqlite"):
+        with _cache_lock:
+            if _cache is None:
+                if LLM_CACHE == "sqlite":
+                    _cache = SQLiteResponseCache(
+                        LLM_CACHE_PATH, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL
+                    )
+                else:
+                    _cache = MemoryResponseCache(LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL)
+    return _cache
+
+
+def should_cache(temperature: float, cache: bool = True) -> bool:
+    """Whether a call at this temperature may use the cache.
+
+    cache=False is the per-call opt-out, for callers that need a new sample
+    every time (e.g. background generation, whose prompt never changes).
+    """
+    if not cache or LLM_CACHE not in ("memory", "sqlite"):
+        return False
+    return temperature == 0 or LLM_CACHE_SAMPLED
+
+
+def _normalize(message) -> dict:
+    content = message.content
+    if isinstance(content, str):
+        content = " ".join(content.split())
+    return {
+        "type": message.type,
+        "content": content,
+        "name": getattr(message, "name", None),
+        "tool_calls": [
+            {"name": call["name"], "args": call["args"]}
+            for call in getattr(message, "tool_calls", None) or ()
+        ],
+    }
+
+
+def response_key(settings: dict, messages: list, schema) -> str:
+    """Hash of the model settings, the normalized messages and the bound schema."""
+    payload = json.dumps(
+        {
+            "settings": settings,
+            "messages": [_normalize(message) for message in messages],
+            "schema": schema,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def lookup(key: str) -> str | None:
+    """Return the cached response for key, recording the hit or miss."""
+    cache = get_response_cache()
+    if cache is None:
+        return None
+    entry = cache.get(key)
+    if entry is None:
+        metrics.increment("llm.cache.misses")
+        return None
+    metrics.increment("llm.cache.hits")
+    metrics.observe("llm.cache.saved", entry[1])
+    return entry[0]
+
+
+def store(key: str, value: str, latency: float) -> None:
+    """Cache a response, with the seconds the model took to produce it."""
+    cache = get_response_cache()
+    if cache is not None:
+        cache.put(key, value, latency)
+
+
+def cache_summary() -> dict:
+    """Hit rate and total model time saved by the response cache."""
+    hits = metrics.counter("llm.cache.hits")
+    lookups = hits + metrics.counter("llm.cache.misses")
+    saved = metrics.snapshot()["timings"].get("llm.cache.saved", {})
+    return {
+        "backend": LLM_CACHE,
+        "hits": hits,
+        "misses": lookups - hits,
+        "hit_rate": hits / lookups if lookups else 0.0,
+        "saved_seconds": saved.get("total", 0.0),
+    }
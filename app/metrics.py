@@ -0,0 +1,61 @@
+import threading
+import time
+from contextlib import contextmanager
+
+_lock = threading.Lock()
+_counters: dict[str, int] = {}
+_timings: dict[str, dict[str, float]] = {}
+
+
+def increment(name: str, value: int = 1) -> None:
+    """Add to a named counter."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def observe(name: str, seconds: float) -> None:
+    """Record one duration under a named timing (count, total and max are kept)."""
+    with _lock:
+        timing = _timings.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+        timing["count"] += 1
+        timing["total"] += seconds
+        timing["max"] = max(timing["max"], seconds)
+
+
+@contextmanager
+def timer(name: str):
+    """Time the enclosed block and record it with observe()."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+
+def counter(name: str) -> int:
+    with _lock:
+        return _counters.get(name, 0)
+
+
+def mean(name: str) -> float | None:
+    """Mean duration in seconds of a timing, or None if nothing was recorded."""
+    with _lock:
+        timing = _timings.get(name)
+        if not timing or not timing["count"]:
+            return None
+        return timing["total"] / timing["count"]
+
+
+def snapshot() -> dict:
+    """Copy of all counters and timings, e.g. for display or export."""
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "timings": {name: dict(t) for name, t in _timings.items()},
+        }
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _timings.clear()
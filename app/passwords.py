@@ -0,0 +1,58 @@
+"""Argon2 password hashing with selectable cost profiles.
+
+The profile is picked with PASSWORD_HASH_PROFILE. Hashes made under another
+profile still verify, and are replaced with one using the current parameters
+the next time the user logs in.
+
+Each Argon2 call allocates its whole memory cost, so hashing runs on a small
+fixed pool of PASSWORD_HASH_WORKERS threads. That bounds peak memory however
+many logins arrive at once; argon2-cffi releases the GIL while hashing, so the
+calling thread (or event loop) is free in the meantime.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+from conf.env import PASSWORD_HASH_PROFILE, PASSWORD_HASH_WORKERS
+
+# memory_cost is in KiB
+HASH_PROFILES = {
+    # OWASP minimum: 19 MiB, 2 passes
+    "low": {"time_cost": 2, "memory_cost": 19456, "parallelism": 1},
+    "medium": {"time_cost": 3, "memory_cost": 65536, "parallelism": 4},
+    # The original parameters: 100 MB, 2 passes, 8 lanes
+    "high": {"time_cost": 2, "memory_cost": 102400, "parallelism": 8},
+}
+
+
+def make_context(profile: str) -> CryptContext:
+    if profile not in HASH_PROFILES:
+        raise ValueError(
+            f"Unknown password hash profile {profile!r}, "
+            f"expected one of {', '.join(HASH_PROFILES)}"
+        )
+    params = {f"argon2__{key}": value for key, value in HASH_PROFILES[profile].items()}
+    return CryptContext(schemes=["argon2"], default="argon2", **params)
+
+
+pwd_context = make_context(PASSWORD_HASH_PROFILE)
+
+_hash_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+
+
+def hash_password(password: str) -> str:
+    return _hash_executor.submit(pwd_context.hash, password).result()
+
+
+def verify_password(password: str, password_hash: str) -> tuple[bool, str | None]:
+    """Check a password, returning (ok, new_hash).
+
+    new_hash is set when the password is right but the stored hash was made
+    with different parameters than the current profile; store it in place of
+    the old one.
+    """
+    return _hash_executor.submit(
+        pwd_context.verify_and_update, password, password_hash
+    ).result()
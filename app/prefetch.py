@@ -0,0 +1,137 @@
+"""Background pre-generation of LLM facts.
+
+A FactPrefetcher keeps a per-category buffer of generated, validated facts that
+have not been handed out yet, so an interactive request for a generated fact can
+be answered without waiting for the model.
+"""
+import threading
+from collections import deque
+from typing import Callable, Iterable
+
+from app.schema import Fact
+
+# Seconds to wait before retrying after the generator raised or returned junk
+ERROR_BACKOFF = 5.0
+
+
+class FactPrefetcher:
+    """Keeps between low_watermark and high_watermark facts buffered per category.
+
+    Workers start refilling a category once it drops below low_watermark and stop
+    once buffered plus in-flight facts reach high_watermark, so the buffer
+    overshoots by at most batch_size - 1 and the model is not called while nobody
+    is consuming. At most max_concurrency generations run at the same time.
+
+    generate(category) must return a {"fact_id", "fact_text"} dict of a fact that
+    is already stored in the database, e.g. produced through add_llm_fact, or a
+    list of up to batch_size such dicts when facts are generated several per call.
+    """
+
+    def __init__(
+        self,
+        generate: Callable[[str], dict | list[dict]],
+        categories: Iterable[str],
+        low_watermark: int = 2,
+        high_watermark: int = 5,
+        max_concurrency: int = 2,
+        batch_size: int = 1,
+    ):
+        if not 0 <= low_watermark <= high_watermark:
+            raise ValueError("Expected 0 <= low_watermark <= high_watermark")
+        self.generate = generate
+        self.low_watermark = low_watermark
+        self.high_watermark = high_watermark
+        self.max_concurrency = max_concurrency
+        self.batch_size = batch_size
+        self._buffers = {category: deque() for category in categories}
+        self._in_flight = {category: 0 for category in self._buffers}
+        self._refilling = {category: True for category in self._buffers}
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._workers = []
+
+    def start(self) -> None:
+        with self._cond:
+            if self._workers:
+                return
+            self._stopping = False
+            for i in range(self.max_concurrency):
+                worker = threading.Thread(
+                    target=self._run, name=f"fact-prefetch-{i}", daemon=True
+                )
+                self._workers.append(worker)
+                worker.start()
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        """Stop the workers, waiting up to timeout for in-flight generations."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.join(timeout)
+
+    def take(
+        self, category: str, accept: Callable[[dict], bool] | None = None
+    ) -> dict | None:
+        """Pop the oldest buffered fact for the category, or None if none is ready.
+
+        If accept is given, facts it rejects are dropped: they are already stored,
+        and a fact the user was served some other way would otherwise sit in the
+        buffer for good and keep it from refilling. accept is called without the
+        lock held, so it may query the database.
+        """
+        buffer = self._buffers.get(category)
+        if buffer is None:
+            return None
+        while True:
+            with self._cond:
+                if not buffer:
+                    return None
+                fact = buffer.popleft()
+                if len(buffer) < self.low_watermark:
+                    self._refilling[category] = True
+                    self._cond.notify_all()
+            if accept is None or accept(fact):
+                return fact
+
+    def buffered(self, category: str) -> int:
+        with self._cond:
+            return len(self._buffers.get(category, ()))
+
+    def _next_category(self) -> str | None:
+        """Pick the emptiest category that needs refilling (caller holds the lock)."""
+        candidates = []
+        for category, buffer in self._buffers.items():
+            level = len(buffer) + self._in_flight[category]
+            if level >= self.high_watermark:
+                self._refilling[category] = False
+            elif self._refilling[category]:
+                candidates.append((level, category))
+        return min(candidates)[1] if candidates else None
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                category = self._next_category()
+                while category is None and not self._stopping:
+                    self._cond.wait()
+                    category = self._next_category()
+                if self._stopping:
+                    return
+                self._in_flight[category] += self.batch_size
+
+            try:
+                result = self.generate(category)
+                if isinstance(result, dict):
+                    result = [result]
+                facts = [Fact(**fact).model_dump() for fact in result]
+            except Exception:
+                facts = []
+
+            with self._cond:
+                self._in_flight[category] -= self.batch_size
+                self._buffers[category].extend(facts)
+                self._cond.notify_all()
+                if not facts:
+                    self._cond.wait_for(lambda: self._stopping, ERROR_BACKOFF)
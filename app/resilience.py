@@ -0,0 +1,208 @@
+"""Deadlines, retries and a circuit breaker for model calls.
+
+Each fact request has a Deadline (LLM_DEADLINE seconds) shared by all of its
+model turns, retries and backoff, and every attempt is given the time left as
+its HTTP timeout. Transient failures (429, 5xx, connection errors, timeouts)
+are retried up to LLM_MAX_RETRIES times with exponential backoff and full
+jitter, waiting at least as long as a Retry-After header asks, unless the wait
+would outlast the deadline.
+
+The process-wide breaker opens after LLM_BREAKER_THRESHOLD consecutive failed
+attempts. While it is open calls fail at once, without touching the network;
+after LLM_BREAKER_COOLDOWN seconds one trial call is let through, and its
+outcome closes the breaker or opens it again. Every way of giving up raises an
+LLMUnavailableError, on which callers serve from the database instead.
+"""
+import asyncio
+import random
+import threading
+import time
+from typing import Awaitable, Callable, TypeVar
+
+import openai
+
+from app import metrics
+from conf.env import (
+    LLM_BREAKER_COOLDOWN,
+    LLM_BREAKER_THRESHOLD,
+    LLM_MAX_RETRIES,
+    LLM_RETRY_BASE_DELAY,
+    LLM_RETRY_MAX_DELAY,
+    LLM_TIMEOUT,
+)
+
+T = TypeVar("T")
+
+# APITimeoutError is an APIConnectionError; TimeoutError is raised by the
+# asyncio deadline around async attempts
+TRANSIENT_ERRORS = (
+    openai.RateLimitError,
+    openai.InternalServerError,
+    openai.APIConnectionError,
+    TimeoutError,
+)
+
+
+class LLMUnavailableError(Exception):
+    """The model could not answer within the request's retries and deadline."""
+
+
+class CircuitOpenError(LLMUnavailableError):
+    """The breaker is open, so the model was not called."""
+
+
+class DeadlineExceededError(LLMUnavailableError):
+    """The request ran out of time before the model answered."""
+
+
+class Deadline:
+    """A point in time (time.monotonic) by which a request must finish."""
+
+    def __init__(self, expires_at: float):
+        self.expires_at = expires_at
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        return cls(time.monotonic() + seconds)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker shared by all threads."""
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_at: float | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at < self.cooldown:
+                return "open"
+            return "half-open"
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may go ahead."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            now = time.monotonic()
+            if now - self._opened_at < self.cooldown:
+                raise CircuitOpenError("LLM circuit breaker is open")
+            # Half-open: one trial call at a time; a trial that never reported
+            # back (e.g. cancelled) is given up on after another cooldown
+            if self._trial_at is not None and now - self._trial_at < self.cooldown:
+                raise CircuitOpenError("LLM circuit breaker is half-open, trial in progress")
+            self._trial_at = now
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = self._trial_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            trial = self._trial_at is not None
+            if trial or self._failures >= self.threshold:
+                if trial or self._opened_at is None:
+                    metrics.increment("llm.breaker.opened")
+                self._opened_at = time.monotonic()
+                self._trial_at = None
+
+    def reset(self) -> None:
+        self.record_success()
+
+
+breaker = CircuitBreaker(LLM_BREAKER_THRESHOLD, LLM_BREAKER_COOLDOWN)
+
+
+def _retry_after(error: Exception) -> float | None:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff(attempt: int, error: Exception) -> float:
+    """Full-jitter exponential backoff, at least the server's Retry-After."""
+    delay = random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * 2**attempt))
+    retry_after = _retry_after(error)
+    return delay if retry_after is None else max(delay, retry_after)
+
+
+def _next_delay(attempt: int, error: Exception, deadline: Deadline) -> float:
+    """Seconds to wait before retrying after error, or raise if giving up."""
+    if attempt == LLM_MAX_RETRIES:
+        raise LLMUnavailableError(
+            f"LLM call failed after {attempt + 1} attempts: {error}"
+        ) from error
+    delay = _backoff(attempt, error)
+    if delay >= deadline.remaining():
+        raise DeadlineExceededError(f"No time left to retry the LLM call: {error}") from error
+    metrics.increment("llm.retries")
+    return delay
+
+
+def _attempt_timeout(deadline: Deadline) -> float:
+    remaining = deadline.remaining()
+    if remaining <= 0:
+        raise DeadlineExceededError("LLM request deadline exceeded")
+    return min(remaining, LLM_TIMEOUT)
+
+
+def call_with_retry(call: Callable[[float], T], deadline: Deadline) -> T:
+    """Return call(timeout), retrying transient failures within the deadline.
+
+    call receives the seconds the attempt may take and should pass them on as
+    the request timeout.
+    """
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        breaker.before_call()
+        timeout = _attempt_timeout(deadline)
+        try:
+            result = call(timeout)
+        except TRANSIENT_ERRORS as error:
+            breaker.record_failure()
+            metrics.increment("llm.errors")
+            time.sleep(_next_delay(attempt, error, deadline))
+            continue
+        except Exception:
+            # The model answered (e.g. 400, unparsable output), so it is up
+            breaker.record_success()
+            raise
+        breaker.record_success()
+        return result
+
+
+async def acall_with_retry(
+    call: Callable[[float], Awaitable[T]], deadline: Deadline
+) -> T:
+    """Async variant of call_with_retry; each attempt is also cut off at its timeout."""
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        breaker.before_call()
+        timeout = _attempt_timeout(deadline)
+        try:
+            async with asyncio.timeout(timeout):
+                result = await call(timeout)
+        except TRANSIENT_ERRORS as error:
+            breaker.record_failure()
+            metrics.increment("llm.errors")
+            await asyncio.sleep(_next_delay(attempt, error, deadline))
+            continue
+        except Exception:
+            breaker.record_success()
+            raise
+        breaker.record_success()
+        return result
@@ -1,6 +1,14 @@
+from typing import List
+
 from pydantic import BaseModel, Field
 
 
 class Fact(BaseModel):
     fact_id: int = Field(..., description="The database ID of the fact", ge=1)
     fact_text: str = Field(..., description="The text of the fact")
+
+
+class GeneratedFacts(BaseModel):
+    facts: List[str] = Field(
+        ..., description="Distinct facts, each one or two sentences long"
+    )
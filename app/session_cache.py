@@ -0,0 +1,96 @@
+"""Short-lived local cache of the logged-in user.
+
+Resolving the session normally means decrypting the keyring file (slow key
+derivation) and querying the database. The cache keeps (user_id, username) in a
+small file next to hashes of the session token and of DATABASE_URL, so a cache
+written against another database is ignored. It is valid for
+SESSION_CACHE_TTL seconds, protected by an HMAC keyed from KEYRING_PASSWORD, and
+deleted on logout. The token itself is never written to the cache.
+"""
+import hashlib
+import hmac
+import json
+import os
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+from conf.env import DATABASE_URL, KEYRING_PASSWORD, SESSION_CACHE_PATH, SESSION_CACHE_TTL
+
+
+class SessionUser(NamedTuple):
+    id: int
+    username: str
+
+
+def _cache_path() -> Path:
+    return Path(SESSION_CACHE_PATH).expanduser()
+
+
+def _signature(payload: bytes) -> str:
+    key = hashlib.sha256(f"factscli-session-cache:{KEYRING_PASSWORD}".encode()).digest()
+    return hmac.new(key, payload, hashlib.sha256).hexdigest()
+
+
+def _token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _database_hash() -> str:
+    return hashlib.sha256(DATABASE_URL.encode()).hexdigest()
+
+
+def load_cached_user(token: str | None = None) -> SessionUser | None:
+    """Return the cached user if the cache exists, is authentic and has not expired.
+
+    The cache must have been written against the current DATABASE_URL and, if
+    token is given, belong to that session.
+    """
+    if not KEYRING_PASSWORD or SESSION_CACHE_TTL <= 0:
+        return None
+    try:
+        data = json.loads(_cache_path().read_text())
+        payload = data["payload"].encode()
+        if not hmac.compare_digest(data["signature"], _signature(payload)):
+            return None
+        entry = json.loads(payload)
+        if entry["expires_at"] < time.time():
+            return None
+        if entry["database_hash"] != _database_hash():
+            return None
+        if token is not None and entry["token_hash"] != _token_hash(token):
+            return None
+        return SessionUser(entry["user_id"], entry["username"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def save_cached_user(token: str, user) -> None:
+    if not KEYRING_PASSWORD or SESSION_CACHE_TTL <= 0:
+        return
+    payload = json.dumps(
+        {
+            "token_hash": _token_hash(token),
+            "database_hash": _database_hash(),
+            "user_id": user.id,
+            "username": user.username,
+            "expires_at": time.time() + SESSION_CACHE_TTL,
+        }
+    )
+    path = _cache_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        signature = _signature(payload.encode())
+        tmp.write_text(json.dumps({"payload": payload, "signature": signature}))
+        os.chmod(tmp, 0o600)
+        tmp.replace(path)
+    except OSError:
+        pass
+
+
+def clear_cached_user() -> None:
+    try:
+        _cache_path().unlink()
+    except OSError:
+        pass
@@ -1,11 +1,8 @@
-from app.auth import get_local_token, get_user_by_token
+from app.auth import get_current_user
 
 
 def restore_session():
-    token = get_local_token()
-    if not token:
-        return None
-    user = get_user_by_token(token)
+    user = get_current_user()
     if not user:
         return None
-    return {"token": token, "username": user.username, "user_id": user.id}
+    return {"username": user.username, "user_id": user.id}
@@ -0,0 +1,53 @@
+"""Benchmark bulk import and export throughput.
+
+Writes a JSONL file of ROWS distinct facts, imports it with import_facts and
+exports it again, reporting rows/sec for each direction.
+
+    python -m benchmarks.bulk_import [ROWS]
+
+Uses a throwaway SQLite database unless FACTCLI_DATABASE_URL is already set.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+_tmpdir = Path(tempfile.mkdtemp())
+os.environ.setdefault(
+    "FACTCLI_DATABASE_URL", f"sqlite:///{_tmpdir / 'bench.sqlite3'}"
+)
+
+from conf.database import engine, init_db  # noqa: E402
+from app.fact_io import export_facts, import_facts  # noqa: E402
+
+ROWS = 1_000_000
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    init_db()
+
+    source = _tmpdir / "facts.jsonl"
+    with open(source, "w", encoding="utf-8") as f:
+        for i in range(rows):
+            category = "happy" if i % 2 else "sad"
+            f.write(json.dumps({"category": category, "fact": f"Fact number {i}."}) + "\n")
+
+    start = time.perf_counter()
+    with open(source, encoding="utf-8") as f:
+        imported, skipped = import_facts(f, "jsonl", batch_size=10_000)
+    elapsed = time.perf_counter() - start
+    print(f"import: {imported} rows ({skipped} skipped) in {elapsed:.1f}s = {imported / elapsed:,.0f} rows/s")
+
+    start = time.perf_counter()
+    with open(_tmpdir / "export.jsonl", "w", encoding="utf-8") as f:
+        exported = export_facts(f, "jsonl", batch_size=10_000)
+    elapsed = time.perf_counter() - start
+    print(f"export: {exported} rows in {elapsed:.1f}s = {exported / elapsed:,.0f} rows/s")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
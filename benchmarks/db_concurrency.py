@@ -0,0 +1,118 @@
+"""Benchmark concurrent readers and writers on SQLite.
+
+Runs READERS threads reading random facts and WRITERS threads adding facts
+for DURATION seconds, once against an engine with SQLite defaults (rollback
+journal, synchronous=FULL, as the app was configured before) and once against
+make_engine() with the PRAGMAs from conf.env. Reports operations/sec and how
+many operations failed with "database is locked".
+
+    python -m benchmarks.db_concurrency [READERS] [WRITERS] [DURATION]
+"""
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from conf.database import Base, make_engine
+from models import Fact
+
+READERS = 8
+WRITERS = 4
+DURATION = 5.0
+SEED_FACTS = 10_000
+
+
+def _seed(engine) -> None:
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Fact),
+            [
+                {"category": "happy", "fact": f"seed fact {i}", "is_created_by_llm": False}
+                for i in range(SEED_FACTS)
+            ],
+        )
+
+
+def _run(engine, readers: int, writers: int, duration: float) -> dict:
+    Session = sessionmaker(bind=engine, autoflush=False)
+    counts = {"reads": 0, "writes": 0, "locked": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def record(key):
+        with lock:
+            counts[key] += 1
+
+    def reader():
+        while time.perf_counter() < deadline:
+            db = Session()
+            try:
+                fact_id = random.randint(1, SEED_FACTS)
+                db.execute(select(Fact.fact).where(Fact.id >= fact_id).limit(1)).scalar()
+                db.execute(
+                    select(Fact.id).where(Fact.category == "happy").order_by(Fact.id.desc()).limit(1)
+                ).scalar()
+                record("reads")
+            except OperationalError:
+                record("locked")
+            finally:
+                db.close()
+
+    def writer(n):
+        i = 0
+        while time.perf_counter() < deadline:
+            db = Session()
+            try:
+                db.add(Fact(category="sad", fact=f"writer {n} fact {i}", is_created_by_llm=True))
+                db.commit()
+                record("writes")
+            except OperationalError:
+                db.rollback()
+                record("locked")
+            finally:
+                db.close()
+            i += 1
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counts
+
+
+def main():
+    readers = int(sys.argv[1]) if len(sys.argv) > 1 else READERS
+    writers = int(sys.argv[2]) if len(sys.argv) > 2 else WRITERS
+    duration = float(sys.argv[3]) if len(sys.argv) > 3 else DURATION
+    tmpdir = Path(tempfile.mkdtemp())
+
+    engines = {
+        "sqlite defaults": create_engine(
+            f"sqlite:///{tmpdir / 'default.sqlite3'}",
+            connect_args={"check_same_thread": False},
+        ),
+        "tuned (make_engine)": make_engine(f"sqlite:///{tmpdir / 'tuned.sqlite3'}"),
+    }
+    print(f"{readers} readers, {writers} writers, {duration:.0f}s each")
+    for name, engine in engines.items():
+        _seed(engine)
+        counts = _run(engine, readers, writers, duration)
+        print(
+            f"{name:<20} {counts['reads'] / duration:9.0f} reads/s "
+            f"{counts['writes'] / duration:8.0f} writes/s  "
+            f"{counts['locked']:5d} locked errors"
+        )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
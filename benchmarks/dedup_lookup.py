@@ -0,0 +1,99 @@
+"""Near-duplicate lookup latency and recall against a large fact table.
+
+Fills a throwaway database with synthetic facts (random content words), builds
+the dedup index with index_fact_range, then times find_near_duplicate for
+texts that are not in the table and for reworded copies of stored facts.
+
+    python -m benchmarks.dedup_lookup [FACTS]
+
+Uses a throwaway SQLite database unless FACTCLI_DATABASE_URL is already set.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+_tmpdir = tempfile.mkdtemp()
+os.environ.setdefault(
+    "FACTCLI_DATABASE_URL", f"sqlite:///{Path(_tmpdir) / 'bench.sqlite3'}"
+)
+
+from sqlalchemy import insert  # noqa: E402
+
+from conf.database import SessionLocal, engine, init_db  # noqa: E402
+from models import Fact  # noqa: E402
+from app.dedup import find_near_duplicate, index_fact_range  # noqa: E402
+
+FACTS = 100_000
+LOOKUPS = 1_000
+WORDS_PER_FACT = 10
+VOCABULARY = [f"word{i}" for i in range(20_000)]
+
+
+def _fact_text(rng: random.Random) -> str:
+    return " ".join(rng.sample(VOCABULARY, WORDS_PER_FACT))
+
+
+def _reword(rng: random.Random, text: str) -> str:
+    """Swap two of the ten words, a Jaccard similarity of 8/12."""
+    words = text.split()
+    for i in rng.sample(range(len(words)), 2):
+        words[i] = rng.choice(VOCABULARY)
+    return " ".join(words)
+
+
+def _seed(rng: random.Random, count: int) -> list[str]:
+    texts = [_fact_text(rng) for _ in range(count)]
+    db = SessionLocal()
+    try:
+        for start in range(0, count, 10_000):
+            db.execute(
+                insert(Fact),
+                [
+                    {"category": "happy", "fact": text, "is_created_by_llm": True}
+                    for text in texts[start:start + 10_000]
+                ],
+            )
+        begin = time.perf_counter()
+        index_fact_range(db, 0)
+        db.commit()
+        elapsed = time.perf_counter() - begin
+        print(f"indexed {count} facts in {elapsed:.1f} s ({count / elapsed:,.0f} facts/s)")
+    finally:
+        db.close()
+    return texts
+
+
+def _time_lookups(texts: list[str]) -> tuple[float, int]:
+    db = SessionLocal()
+    try:
+        found = 0
+        start = time.perf_counter()
+        for text in texts:
+            if find_near_duplicate(db, "happy", text) is not None:
+                found += 1
+        ms = (time.perf_counter() - start) / len(texts) * 1000
+    finally:
+        db.close()
+    return ms, found
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else FACTS
+    rng = random.Random(42)
+    init_db()
+    stored = _seed(rng, count)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+
+    new = [_fact_text(rng) for _ in range(LOOKUPS)]
+    reworded = [_reword(rng, text) for text in rng.sample(stored, LOOKUPS)]
+    for name, texts in (("new facts", new), ("reworded facts", reworded)):
+        ms, found = _time_lookups(texts)
+        print(f"{name:<15} {ms:6.3f} ms/lookup  {found / len(texts):6.1%} flagged as duplicates")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Benchmark the fact text cache on the database serving path.
+
+USERS users each take batches of BATCH unseen facts from a shared set of FACTS
+facts (as with LLM-generated facts served to everyone), recording them as seen.
+The run is repeated with the cache disabled and enabled, reporting the time and
+SQL statements spent in get_facts_from_db and the cache hit rate.
+
+    python -m benchmarks.fact_cache [USERS]
+
+Uses a throwaway SQLite database unless FACTCLI_DATABASE_URL is already set.
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+_tmpdir = tempfile.mkdtemp()
+os.environ.setdefault(
+    "FACTCLI_DATABASE_URL", f"sqlite:///{Path(_tmpdir) / 'bench.sqlite3'}"
+)
+
+from sqlalchemy import event, insert  # noqa: E402
+
+from conf.database import SessionLocal, engine, init_db  # noqa: E402
+from conf.env import FACT_CACHE_MAX_BYTES  # noqa: E402
+from models import Fact, User  # noqa: E402
+from app.fact_cache import fact_cache  # noqa: E402
+from app.facts import add_user_facts, get_facts_from_db  # noqa: E402
+
+USERS = 50
+FACTS = 2_000
+BATCH = 20
+BATCHES_PER_USER = 20
+# A typical generated fact is a sentence or two
+FACT_TEXT = "Sea otters hold hands while they sleep so they don't drift apart. " * 3
+
+statements = [0]
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count_statement(*_):
+    statements[0] += 1
+
+
+def _seed(users: int) -> list[list[int]]:
+    db = SessionLocal()
+    try:
+        db.execute(
+            insert(Fact),
+            [
+                {"category": "happy", "fact": f"{i}: {FACT_TEXT}", "is_created_by_llm": True}
+                for i in range(FACTS)
+            ],
+        )
+        runs = []
+        for name in ("disabled", "enabled"):
+            group = [User(username=f"{name}-{i}", password_hash="x") for i in range(users)]
+            db.add_all(group)
+            db.flush()
+            runs.append([u.id for u in group])
+        db.commit()
+        return runs
+    finally:
+        db.close()
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else USERS
+    init_db()
+    runs = _seed(users)
+
+    print(f"{users} users x {BATCHES_PER_USER} batches of {BATCH} from {FACTS} shared facts")
+    for (name, max_bytes), user_ids in zip(
+        (("cache disabled", 0), ("cache enabled", FACT_CACHE_MAX_BYTES)), runs
+    ):
+        fact_cache.max_bytes = max_bytes
+        fact_cache.clear()
+        fact_cache.hits = fact_cache.misses = fact_cache.evictions = 0
+        elapsed = 0.0
+        served = 0
+        for _ in range(BATCHES_PER_USER):
+            for user_id in user_ids:
+                before = statements[0]
+                start = time.perf_counter()
+                facts = get_facts_from_db("happy", user_id, BATCH)
+                elapsed += time.perf_counter() - start
+                served += statements[0] - before
+                add_user_facts(user_id, [f["fact_id"] for f in facts])
+        requests = users * BATCHES_PER_USER
+        stats = fact_cache.stats()
+        print(
+            f"{name:<15} {elapsed / requests * 1000:6.2f} ms/batch  "
+            f"{served / requests:4.1f} statements/batch  "
+            f"hit rate {stats['hit_rate']:4.0%}  {stats['bytes'] / 2**20:5.2f} MiB cached"
+        )
+
+
+if __name__ == "__main__":
+    main()
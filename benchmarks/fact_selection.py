@@ -0,0 +1,88 @@
+"""Benchmark get_fact_from_db as the facts and user_facts tables grow.
+
+Run from the project root:
+
+    python -m benchmarks.fact_selection
+
+Uses a throwaway SQLite database unless FACTCLI_DATABASE_URL is already set.
+"""
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+_tmpdir = tempfile.mkdtemp()
+os.environ.setdefault(
+    "FACTCLI_DATABASE_URL", f"sqlite:///{Path(_tmpdir) / 'bench.sqlite3'}"
+)
+
+from conf.database import SessionLocal, engine, init_db  # noqa: E402
+from models import Fact, User, UserFact  # noqa: E402
+from app.facts import get_fact_from_db  # noqa: E402
+from app.fact_pool import rebuild_pools  # noqa: E402
+
+SIZES = [1_000, 10_000, 100_000]
+SEEN_RATIO = 0.9
+CALLS = 200
+
+
+def _grow_to(size: int, user_id: int, current: int) -> None:
+    db = SessionLocal()
+    try:
+        db.bulk_insert_mappings(
+            Fact,
+            [
+                {"category": "happy", "fact": f"fact {i}", "is_created_by_llm": True}
+                for i in range(current, size)
+            ],
+        )
+        db.commit()
+        ids = [r.id for r in db.query(Fact.id).filter(Fact.id > current)]
+        # Users are served random facts, so what they have seen is scattered
+        random.shuffle(ids)
+        db.bulk_insert_mappings(
+            UserFact,
+            [
+                {"user_id": user_id, "fact_id": fact_id}
+                for fact_id in ids[: int(len(ids) * SEEN_RATIO)]
+            ],
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def main():
+    init_db()
+    db = SessionLocal()
+    try:
+        user = User(username="bench", password_hash="x")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+    finally:
+        db.close()
+
+    print(f"{'facts':>10} {'seen':>10} {'mean ms':>10} {'p95 ms':>10}")
+    current = 0
+    for size in SIZES:
+        _grow_to(size, user_id, current)
+        # Bulk inserts bypass incremental pool maintenance
+        rebuild_pools()
+        current = size
+        timings = []
+        for _ in range(CALLS):
+            start = time.perf_counter()
+            get_fact_from_db("happy", user_id)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        print(
+            f"{size:>10} {int(size * SEEN_RATIO):>10} "
+            f"{sum(timings) / len(timings):>10.3f} {timings[int(len(timings) * 0.95)]:>10.3f}"
+        )
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
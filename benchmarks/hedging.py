@@ -0,0 +1,149 @@
+"""Tail latency of fact generation with and without hedging to a second provider.
+
+Two local stub OpenAI-compatible servers play the providers. Both usually
+answer quickly, but a share SLOW_RATE of their requests (seeded differently)
+takes SLOW_LATENCY seconds. Each run asks for REQUESTS generated facts one
+after another, first from the primary alone, then hedged to the secondary, with
+the sync and the async client. The hedge delay starts at LLM_HEDGE_DELAY and
+follows the primary's LLM_HEDGE_PERCENTILE latency once it has enough samples,
+so each run starts with LLM_HEDGE_MIN_SAMPLES untimed requests. For each run
+the latency percentiles, the model calls per request (the price of hedging)
+and the hedges that answered first are reported.
+
+    python -m benchmarks.hedging [REQUESTS]
+
+Uses a throwaway SQLite database unless FACTCLI_DATABASE_URL is already set.
+"""
+import asyncio
+import json
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.stub_llm import StubLLMServer
+
+REQUESTS = 200
+LATENCY = 0.05
+SECONDARY_LATENCY = 0.08
+SLOW_RATE = 0.05
+SLOW_LATENCY = 1.0
+
+
+def _respond(request: dict) -> dict:
+    k = int(re.search(r"Give me (\d+)", request["messages"][-1]["content"]).group(1))
+    facts = [f"Generated fact {time.perf_counter_ns()}-{i}." for i in range(k)]
+    return {"content": json.dumps({"facts": facts})}
+
+
+_primary = StubLLMServer(
+    latency=LATENCY, respond=_respond, slow_rate=SLOW_RATE, slow_latency=SLOW_LATENCY
+).__enter__()
+_secondary = StubLLMServer(
+    latency=SECONDARY_LATENCY,
+    respond=_respond,
+    slow_rate=SLOW_RATE,
+    slow_latency=SLOW_LATENCY,
+    seed=2,
+).__enter__()
+_tmpdir = tempfile.mkdtemp()
+os.environ.setdefault(
+    "FACTCLI_DATABASE_URL", f"sqlite:///{Path(_tmpdir) / 'bench.sqlite3'}"
+)
+os.environ.update(
+    LLM="stub",
+    LLM_API_KEY="stub",
+    LLM_BASE_URL=_primary.base_url,
+    LLM_PROVIDERS=f"stub@{_primary.base_url},stub@{_secondary.base_url}",
+    LLM_CACHE="off",
+)
+os.environ.setdefault("LLM_HEDGE_DELAY", "0.5")
+
+from conf.env import LLM_HEDGE_MIN_SAMPLES  # noqa: E402
+from app import hedging, metrics  # noqa: E402
+from app.agent import (  # noqa: E402
+    aclose_llm_clients,
+    agenerate_llm_facts,
+    close_llm_clients,
+    generate_llm_facts,
+)
+
+
+def _reset(hedge: bool) -> None:
+    hedging.LLM_HEDGE_ENABLED = hedge
+    for provider in hedging.PROVIDERS:
+        provider.latencies = hedging.LatencyHistogram()
+
+
+def _report(name: str, latencies: list[float], calls: int) -> None:
+    latencies = sorted(latencies)
+    requests = len(latencies)
+
+    def percentile(p: float) -> float:
+        return latencies[min(requests - 1, int(requests * p / 100))] * 1000
+
+    print(
+        f"{name:<14} p50 {percentile(50):5.0f} ms  p95 {percentile(95):5.0f} ms  "
+        f"p99 {percentile(99):5.0f} ms  mean {statistics.mean(latencies) * 1000:5.0f} ms  "
+        f"{calls / requests:4.2f} calls/request  "
+        f"{metrics.counter('llm.hedge.won'):3d} hedges won  "
+        f"hedge delay {hedging.primary().hedge_delay() * 1000:4.0f} ms"
+    )
+
+
+def _run(name: str, requests: int, hedge: bool) -> None:
+    _reset(hedge)
+    for _ in range(LLM_HEDGE_MIN_SAMPLES):
+        generate_llm_facts("happy", 1, cache=False)
+    metrics.reset()
+    calls = _primary.requests + _secondary.requests
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        generate_llm_facts("happy", 1, cache=False)
+        latencies.append(time.perf_counter() - start)
+    _report(name, latencies, _primary.requests + _secondary.requests - calls)
+
+
+async def _arun(name: str, requests: int, hedge: bool) -> None:
+    _reset(hedge)
+    for _ in range(LLM_HEDGE_MIN_SAMPLES):
+        await agenerate_llm_facts("happy", 1, cache=False)
+    metrics.reset()
+    calls = _primary.requests + _secondary.requests
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await agenerate_llm_facts("happy", 1, cache=False)
+        latencies.append(time.perf_counter() - start)
+    _report(name, latencies, _primary.requests + _secondary.requests - calls)
+
+
+async def _async_runs(requests: int) -> None:
+    await _arun("async primary", requests, hedge=False)
+    await _arun("async hedged", requests, hedge=True)
+    await aclose_llm_clients()
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else REQUESTS
+    print(
+        f"{requests} requests per run; primary {LATENCY * 1000:.0f} ms, secondary "
+        f"{SECONDARY_LATENCY * 1000:.0f} ms, {SLOW_RATE:.0%} of either take "
+        f"{SLOW_LATENCY * 1000:.0f} ms"
+    )
+    try:
+        _run("primary only", requests, hedge=False)
+        _run("hedged", requests, hedge=True)
+        asyncio.run(_async_runs(requests))
+    finally:
+        close_llm_clients()
+        _primary.__exit__(None, None, None)
+        _secondary.__exit__(None, None, None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Import-time budget for lightweight CLI commands.
+
+Runs `python -X importtime` on the modules a lightweight command (whoami,
+history, add, signout) loads, and exits non-zero if their import time goes over
+budget or if they pull in one of the heavy stacks that only fact generation or
+the TUI need. Suitable as a CI step:
+
+    python -m benchmarks.import_time [BUDGET_MS]
+"""
+import os
+import subprocess
+import sys
+
+# What `factscli whoami` imports before running the command
+LIGHT_IMPORTS = "import main, app.cli, app.auth"
+# Modules only the fact-generation, shell and TUI code paths may load
+FORBIDDEN = ["langchain_openai", "langgraph", "textual", "tui", "keyrings.cryptfile"]
+BUDGET_MS = 1500
+RUNS = 3
+
+
+def _measure() -> tuple[float, set[str]]:
+    env = {**os.environ, "PYTHONPATH": os.getcwd()}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", LIGHT_IMPORTS],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    total_us = 0
+    modules = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.add(name.strip())
+        # Top-level imports have no indentation; their cumulative times add up
+        if not name.startswith("  "):
+            total_us += int(cumulative)
+    return total_us / 1000, modules
+
+
+def main():
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else BUDGET_MS
+    results = [_measure() for _ in range(RUNS)]
+    best = min(ms for ms, _ in results)
+    modules = results[0][1]
+
+    print(f"lightweight command imports: {best:.0f} ms (budget {budget:.0f} ms)")
+    failed = False
+    for name in FORBIDDEN:
+        if any(m == name or m.startswith(name + ".") for m in modules):
+            print(f"FAIL: {name} is imported by lightweight commands")
+            failed = True
+    if best > budget:
+        print("FAIL: import time over budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Model calls and latency saved by the LLM response cache.
+
+The "studio" rows rerun the agent graph USERS times with one fixed input, as
+LangGraph Studio does, and the "writer" rows call the fact writer USERS times
+with an empty "already told" context. The "routes" rows have USERS new users
+each ask for a generated fact in both generation modes; those routes bypass
+the cache, so they should show no hits. Everything runs first with the
+default settings (LLM_CACHE and LLM_CACHE_SAMPLED from the environment, off
+unless set), then with each backend and LLM_CACHE_SAMPLED on, which the cache
+needs to store anything as the model samples at temperature 0.7. The model is
+a local stub OpenAI-compatible server answering after LATENCY seconds.
+
+    python -m benchmarks.llm_cache [USERS]
+
+Uses a throwaway SQLite database (and cache file) unless FACTCLI_DATABASE_URL
+is already set.
+"""
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.stub_llm import StubLLMServer
+
+USERS = 20
+LATENCY = 0.2
+_rng = random.Random(7)
+_vocabulary = [f"topic{i}" for i in range(5_000)]
+
+
+def _fact_text() -> str:
+    return "Did you know: " + " ".join(_rng.sample(_vocabulary, 8)) + "."
+
+
+def _respond(request: dict) -> dict:
+    """Answer like a cooperative model for both generation modes."""
+    last = request["messages"][-1]
+    if "response_format" in request:
+        k = int(re.search(r"Give me (\d+)", last["content"]).group(1))
+        return {"content": json.dumps({"facts": [_fact_text() for _ in range(k)]})}
+    if last["role"] == "tool":
+        return {"content": "Here is your fact."}
+    category = re.search(r"Generate a (\w+) fact", last["content"]).group(1)
+    user_id = int(re.search(r"user_id is: (\d+)", request["messages"][0]["content"]).group(1))
+    arguments = {"category": category, "fact_text": _fact_text(), "user_id": user_id}
+    return {
+        "content": None,
+        "tool_calls": [
+            {
+                "id": "call_add",
+                "type": "function",
+                "function": {"name": "add_llm_fact", "arguments": json.dumps(arguments)},
+            }
+        ],
+    }
+
+
+_server = StubLLMServer(latency=LATENCY, respond=_respond).__enter__()
+_tmpdir = tempfile.mkdtemp()
+os.environ.setdefault(
+    "FACTCLI_DATABASE_URL", f"sqlite:///{Path(_tmpdir) / 'bench.sqlite3'}"
+)
+os.environ.update(LLM="stub", LLM_API_KEY="stub", LLM_BASE_URL=_server.base_url)
+
+from langchain_core.messages import HumanMessage  # noqa: E402
+
+from conf.database import SessionLocal, init_db  # noqa: E402
+from models import User  # noqa: E402
+from app import llm_cache, metrics  # noqa: E402
+from app.agent import close_llm_clients, generate_llm_facts, get_agent_graph  # noqa: E402
+from app.fact_handler import _serve_from_agent, _serve_from_generation  # noqa: E402
+
+
+def _new_users(prefix: str, count: int) -> list[int]:
+    db = SessionLocal()
+    try:
+        users = [User(username=f"{prefix}-{i}", password_hash="x") for i in range(count)]
+        db.add_all(users)
+        db.commit()
+        return [user.id for user in users]
+    finally:
+        db.close()
+
+
+def _serve_studio(category: str, user_id: int) -> None:
+    get_agent_graph().invoke(
+        {
+            "messages": [HumanMessage(content=f"Generate a {category} fact yourself.")],
+            "user_id": 1,
+            "known_facts": "",
+        }
+    )
+
+
+def _serve_writer(category: str, user_id: int) -> None:
+    generate_llm_facts(category, 5)
+
+
+def _serve_routes(category: str, user_id: int) -> None:
+    _serve_from_agent("sad", user_id)
+    _serve_from_generation("happy", user_id)
+
+
+def _use_backend(backend: str, sampled: bool) -> None:
+    llm_cache.LLM_CACHE = backend
+    llm_cache.LLM_CACHE_SAMPLED = sampled
+    llm_cache.LLM_CACHE_PATH = str(Path(_tmpdir) / f"{backend}-cache.sqlite3")
+    llm_cache._cache = None
+
+
+def _run(name: str, mode: str, serve, users: int) -> None:
+    user_ids = _new_users(f"{name}-{mode}", users)
+    metrics.reset()
+    calls = _server.requests
+    start = time.perf_counter()
+    for user_id in user_ids:
+        serve("happy", user_id)
+    elapsed = time.perf_counter() - start
+    summary = llm_cache.cache_summary()
+    print(
+        f"{name:<8} {mode:<6} {_server.requests - calls:4d} model calls  "
+        f"{elapsed / users * 1000:6.0f} ms/fact  hit rate {summary['hit_rate']:4.0%}  "
+        f"{summary['saved_seconds']:5.1f} s saved"
+    )
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else USERS
+    init_db()
+    print(f"{users} requests per row, {LATENCY * 1000:.0f} ms per model call")
+    try:
+        configurations = [
+            ("default", llm_cache.LLM_CACHE, llm_cache.LLM_CACHE_SAMPLED),
+            ("memory", "memory", True),
+            ("sqlite", "sqlite", True),
+        ]
+        for name, backend, sampled in configurations:
+            _use_backend(backend, sampled)
+            _run(name, "studio", _serve_studio, users)
+            _run(name, "writer", _serve_writer, users)
+            _run(name, "routes", _serve_routes, users)
+    finally:
+        close_llm_clients()
+        _server.__exit__(None, None, None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Compare a fresh ChatOpenAI per turn with the pooled client registry.
+
+Runs against a local stub OpenAI-compatible server and reports latency and
+how many TCP connections each approach opened.
+
+    python -m benchmarks.llm_client_reuse
+"""
+import time
+
+from langchain_core.messages import HumanMessage
+from langchain_openai import ChatOpenAI
+
+from app.agent import TOOLS, _get_llm, close_llm_clients
+from benchmarks.stub_llm import StubLLMServer
+
+TURNS = 100
+MESSAGES = [HumanMessage(content="Tell me a happy fact.")]
+
+
+def _run(server: StubLLMServer, get_llm) -> tuple[float, int]:
+    connections = server.connections
+    start = time.perf_counter()
+    for _ in range(TURNS):
+        get_llm().invoke(MESSAGES)
+    elapsed = (time.perf_counter() - start) / TURNS * 1000
+    return elapsed, server.connections - connections
+
+
+def main():
+    with StubLLMServer() as server:
+
+        def fresh():
+            return ChatOpenAI(
+                api_key="stub", base_url=server.base_url, model="stub", temperature=0.7
+            ).bind_tools(TOOLS)
+
+        def pooled():
+            return _get_llm(
+                model="stub", base_url=server.base_url, temperature=0.7, api_key="stub"
+            )
+
+        for name, get_llm in (("fresh client", fresh), ("registry", pooled)):
+            ms, connections = _run(server, get_llm)
+            print(f"{name:<13} {ms:8.3f} ms/turn  {connections:4d} connections")
+
+    close_llm_clients()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Compare LLM calls and tokens per fact for the agent and batch generation modes.
+
+A user who has seen every stored fact asks for REQUESTS facts. Each request is
+served from the database when possible and otherwise from the LLM, either
+through the tool-calling agent (one stored fact per two model turns) or with
+one structured-output call that stores LLM_FACTS_PER_CALL facts. The model is a
+local stub OpenAI-compatible server, so real ChatOpenAI requests (prompts,
+tool schemas, responses) are counted; tokens are estimated at 4 characters each.
+
+    python -m benchmarks.llm_generation [REQUESTS]
+
+Uses a throwaway SQLite database unless FACTCLI_DATABASE_URL is already set.
+"""
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.stub_llm import StubLLMServer
+
+REQUESTS = 50
+_rng = random.Random(7)
+_vocabulary = [f"topic{i}" for i in range(5_000)]
+
+
+def _fact_text() -> str:
+    return "Did you know: " + " ".join(_rng.sample(_vocabulary, 8)) + "."
+
+
+def _respond(request: dict) -> dict:
+    """Answer like a cooperative model for both generation modes."""
+    last = request["messages"][-1]
+    tools = [tool["function"]["name"] for tool in request.get("tools", [])]
+    if "response_format" in request or "GeneratedFacts" in tools:
+        k = int(re.search(r"Give me (\d+)", last["content"]).group(1))
+        facts = json.dumps({"facts": [_fact_text() for _ in range(k)]})
+        if "response_format" in request:
+            return {"content": facts}
+        return {
+            "content": None,
+            "tool_calls": [
+                {
+                    "id": "call_facts",
+                    "type": "function",
+                    "function": {"name": "GeneratedFacts", "arguments": facts},
+                }
+            ],
+        }
+    if last["role"] == "tool":
+        return {"content": "Here is your fact."}
+    category = re.search(r"Generate a (\w+) fact", last["content"]).group(1)
+    user_id = int(re.search(r"user_id is: (\d+)", request["messages"][0]["content"]).group(1))
+    arguments = {"category": category, "fact_text": _fact_text(), "user_id": user_id}
+    return {
+        "content": None,
+        "tool_calls": [
+            {
+                "id": "call_add",
+                "type": "function",
+                "function": {"name": "add_llm_fact", "arguments": json.dumps(arguments)},
+            }
+        ],
+    }
+
+
+_server = StubLLMServer(respond=_respond).__enter__()
+_tmpdir = tempfile.mkdtemp()
+os.environ.setdefault(
+    "FACTCLI_DATABASE_URL", f"sqlite:///{Path(_tmpdir) / 'bench.sqlite3'}"
+)
+# Every call must reach the model to be measured
+os.environ.update(
+    LLM="stub", LLM_API_KEY="stub", LLM_BASE_URL=_server.base_url, LLM_CACHE="off"
+)
+
+from sqlalchemy import func, select  # noqa: E402
+
+from conf.database import SessionLocal, init_db  # noqa: E402
+from conf.env import LLM_FACTS_PER_CALL  # noqa: E402
+from models import Fact, User  # noqa: E402
+from app.agent import close_llm_clients  # noqa: E402
+from app.fact_handler import (  # noqa: E402
+    _serve_from_agent,
+    _serve_from_db,
+    _serve_from_generation,
+)
+
+
+def _stored_facts(category: str) -> int:
+    db = SessionLocal()
+    try:
+        return db.execute(
+            select(func.count(Fact.id)).where(Fact.category == category)
+        ).scalar()
+    finally:
+        db.close()
+
+
+def _run(name: str, serve, category: str, requests: int) -> None:
+    db = SessionLocal()
+    try:
+        user = User(username=f"bench-{name}", password_hash="x")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+    finally:
+        db.close()
+
+    calls = _server.requests
+    prompt, completion = _server.tokens
+    for _ in range(requests):
+        if _serve_from_db(category, user_id) is None:
+            serve(category, user_id)
+    calls = _server.requests - calls
+    prompt = _server.tokens[0] - prompt
+    completion = _server.tokens[1] - completion
+    stored = _stored_facts(category)
+
+    print(
+        f"{name:<6} {calls:4d} model calls  {stored:4d} facts stored  "
+        f"{calls / requests:5.2f} calls/fact served  "
+        f"{(prompt + completion) / stored:7.0f} tokens/fact stored "
+        f"({prompt / stored:.0f} prompt, {completion / stored:.0f} completion)"
+    )
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else REQUESTS
+    init_db()
+    print(f"{requests} fact requests, {LLM_FACTS_PER_CALL} facts per batch call")
+    try:
+        _run("agent", _serve_from_agent, "sad", requests)
+        _run("batch", _serve_from_generation, "happy", requests)
+    finally:
+        close_llm_clients()
+        _server.__exit__(None, None, None)
+
+
+if __name__ == "__main__":
+    main()
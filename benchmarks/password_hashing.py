@@ -0,0 +1,69 @@
+"""Benchmark the Argon2 cost profiles.
+
+For each profile, hashes HASHES passwords through the bounded hashing pool in a
+fresh process and reports hashes/sec, single-hash latency and the process's
+peak RSS. Each profile gets its own process because peak RSS only grows.
+
+    python -m benchmarks.password_hashing [HASHES]
+
+Set PASSWORD_HASH_WORKERS to see how the pool size trades throughput for memory.
+"""
+import os
+import subprocess
+import sys
+import time
+
+HASHES = 16
+
+_CHILD = """
+import resource, sys, time
+from concurrent.futures import ThreadPoolExecutor
+from app.passwords import hash_password
+
+hashes = int(sys.argv[1])
+start = time.perf_counter()
+hash_password("warm-up password")
+single = time.perf_counter() - start
+
+# More callers than pool workers, like a burst of concurrent logins
+start = time.perf_counter()
+with ThreadPoolExecutor(max_workers=hashes) as callers:
+    list(callers.map(hash_password, (f"password {i}" for i in range(hashes))))
+elapsed = time.perf_counter() - start
+peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(hashes / elapsed, single * 1000, peak_kib / 1024)
+"""
+
+
+def _run_profile(profile: str, hashes: int) -> tuple[float, float, float]:
+    env = {**os.environ, "PYTHONPATH": os.getcwd(), "PASSWORD_HASH_PROFILE": profile}
+    proc = subprocess.run(
+        [sys.executable, "-c", _CHILD, str(hashes)],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    rate, latency_ms, peak_mib = map(float, proc.stdout.split())
+    return rate, latency_ms, peak_mib
+
+
+def main():
+    from app.passwords import HASH_PROFILES
+    from conf.env import PASSWORD_HASH_WORKERS
+
+    hashes = int(sys.argv[1]) if len(sys.argv) > 1 else HASHES
+    print(f"{hashes} concurrent hashes, {PASSWORD_HASH_WORKERS} hashing workers")
+    for profile, params in HASH_PROFILES.items():
+        started = time.perf_counter()
+        rate, latency_ms, peak_mib = _run_profile(profile, hashes)
+        print(
+            f"{profile:<7} m={params['memory_cost'] // 1024:>4} MiB "
+            f"t={params['time_cost']} p={params['parallelism']}  "
+            f"{rate:7.1f} hashes/s  {latency_ms:7.1f} ms/hash  "
+            f"peak RSS {peak_mib:7.1f} MiB  ({time.perf_counter() - started:.1f}s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
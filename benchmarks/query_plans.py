@@ -0,0 +1,184 @@
+"""Query-plan regression check for app.facts and app.auth.
+
+Calls every database helper in app.facts and app.auth against a seeded
+throwaway database, captures the SQL each one sends, and runs the database's
+EXPLAIN on every statement. Exits non-zero if any plan contains a full table
+scan or sorts rows an index could have returned in order, so it can run as a
+CI step:
+
+    python -m benchmarks.query_plans
+
+Uses SQLite unless FACTCLI_DATABASE_URL is set; on PostgreSQL sequential scans
+are disabled for the check, so a "Seq Scan" in the plan means no index fits.
+The keyring and session cache are redirected into the temporary directory.
+"""
+import os
+import re
+import sys
+import tempfile
+from pathlib import Path
+
+_tmpdir = Path(tempfile.mkdtemp())
+os.environ.setdefault(
+    "FACTCLI_DATABASE_URL", f"sqlite:///{_tmpdir / 'bench.sqlite3'}"
+)
+os.environ.setdefault("KEYRING_PASSWORD", "query-plans")
+os.environ["XDG_DATA_HOME"] = str(_tmpdir)
+os.environ["SESSION_CACHE_PATH"] = str(_tmpdir / "session.json")
+
+from sqlalchemy import event, insert  # noqa: E402
+
+from conf.database import SessionLocal, engine, init_db  # noqa: E402
+from models import Fact, UserFact  # noqa: E402
+from app import auth, facts  # noqa: E402
+
+FACTS = 5_000
+SEEN = 1_000
+
+# Statements whose plans may scan or sort on purpose, with the reason
+ALLOWED: dict[str, str] = {}
+
+_FULL_SCAN = {
+    "sqlite": re.compile(r"^SCAN (?!CONSTANT ROW)(\w+)"),
+    "postgresql": re.compile(r"Seq Scan on (\w+)"),
+}
+_SORT = {
+    "sqlite": re.compile(r"^USE TEMP B-TREE FOR ORDER BY"),
+    "postgresql": re.compile(r"^(?:->\s*)?Sort\b"),
+}
+
+captured: dict[str, tuple[str, object]] = {}
+_current = [""]
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _capture(conn, cursor, statement, parameters, context, executemany):
+    sql = statement.lstrip().upper()
+    # Plain INSERT ... VALUES reads nothing, so only INSERT ... SELECT is checked
+    if sql.startswith("INSERT") and " SELECT " not in sql:
+        return
+    if sql.startswith(("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")):
+        if executemany:
+            parameters = parameters[0]
+        captured.setdefault(statement, (_current[0], parameters))
+
+
+def _seed() -> None:
+    db = SessionLocal()
+    try:
+        db.execute(
+            insert(Fact),
+            [
+                {
+                    "category": "happy" if i % 2 else "sad",
+                    "fact": f"seed fact {i}",
+                    "is_created_by_llm": True,
+                }
+                for i in range(FACTS)
+            ],
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def _exercise() -> None:
+    """Call each helper the way the app does."""
+    calls = [
+        ("auth.signup", lambda: auth.signup("plans", "plans-password")),
+        ("auth.login", lambda: auth.login("plans", "plans-password")),
+    ]
+    for name, call in calls:
+        _current[0] = name
+        call()
+
+    token = auth.get_local_token()
+    user = auth.get_user_by_token(token)
+    auth._users_by_token.clear()
+
+    db = SessionLocal()
+    try:
+        db.execute(
+            insert(UserFact),
+            [{"user_id": user.id, "fact_id": i} for i in range(2, SEEN * 2, 2)],
+        )
+        db.commit()
+    finally:
+        db.close()
+
+    calls = [
+        ("auth.get_user_by_token", lambda: auth.get_user_by_token(token)),
+        ("facts.add_fact", lambda: facts.add_fact("happy", "a user fact", user.id)),
+        ("facts.get_fact_from_db", lambda: facts.get_fact_from_db("happy", user.id)),
+        ("facts.get_facts_from_db", lambda: facts.get_facts_from_db("sad", user.id, 5)),
+        ("facts.add_llm_fact", lambda: facts.add_llm_fact("happy", "an llm fact", user.id)),
+        ("facts.add_llm_facts", lambda: facts.add_llm_facts("sad", ["one", "two"])),
+        ("facts.add_user_fact", lambda: facts.add_user_fact(user.id, 1)),
+        ("facts.add_user_facts", lambda: facts.add_user_facts(user.id, [3, 5])),
+        ("facts.has_seen_fact", lambda: facts.has_seen_fact(user.id, 3)),
+        ("facts.get_user_history", lambda: facts.get_user_history(user.id, limit=10)),
+        (
+            "facts.get_user_history_page",
+            lambda: facts.get_user_history_page(
+                user.id, 10, facts.get_user_history_page(user.id, 1)[0].cursor
+            ),
+        ),
+        ("facts.count_user_history", lambda: facts.count_user_history(user.id)),
+        ("auth.logout", lambda: auth.logout(token)),
+    ]
+    for name, call in calls:
+        _current[0] = name
+        call()
+
+
+def _explain(conn, dialect: str, statement: str, parameters) -> list[str]:
+    cursor = conn.connection.cursor()
+    try:
+        if dialect == "sqlite":
+            cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            return [row[-1] for row in cursor.fetchall()]
+        cursor.execute("SET enable_seqscan = off")
+        cursor.execute(f"EXPLAIN {statement}", parameters)
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def main():
+    dialect = engine.dialect.name
+    if dialect not in _FULL_SCAN:
+        sys.exit(f"Query plan check supports sqlite and postgresql, not {dialect}")
+    init_db()
+    _seed()
+    # Give the planner real statistics, as a long-lived database would have
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    captured.clear()
+    _exercise()
+
+    failed = 0
+    with engine.connect() as conn:
+        for statement, (caller, parameters) in captured.items():
+            plan = _explain(conn, dialect, statement, parameters)
+            problems = [
+                f"full scan of {m.group(1)}"
+                for line in plan
+                if (m := _FULL_SCAN[dialect].search(line.strip()))
+            ]
+            if any(_SORT[dialect].search(line.strip()) for line in plan):
+                problems.append("sort")
+            if not problems or statement in ALLOWED:
+                continue
+            failed += 1
+            print(f"FAIL {caller}: {', '.join(problems)}")
+            print("  " + " ".join(statement.split()))
+            for line in plan:
+                print(f"    {line}")
+        conn.rollback()
+
+    print(f"{len(captured)} statements checked, {failed} with full scans or sorts")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Fact requests through a flaky, failing, recovering and hanging model.
+
+Every request is routed to the LLM (batch generation) against a local stub
+OpenAI-compatible server whose error rate and latency change between phases.
+For each phase the share of requests answered by the LLM and by the database
+fallback, the model calls made and the mean latency per request are reported,
+with the circuit breaker state at the end of the phase. Deadlines, backoff and
+breaker settings are scaled down so the run takes seconds.
+
+    python -m benchmarks.resilience [REQUESTS]
+
+Uses a throwaway SQLite database unless FACTCLI_DATABASE_URL is already set.
+"""
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.stub_llm import StubLLMServer
+
+REQUESTS = 40
+LATENCY = 0.05
+SEED_FACTS = 500
+
+
+def _respond(request: dict) -> dict:
+    k = int(re.search(r"Give me (\d+)", request["messages"][-1]["content"]).group(1))
+    facts = [f"Generated fact {time.perf_counter_ns()}-{i}." for i in range(k)]
+    return {"content": json.dumps({"facts": facts})}
+
+
+_server = StubLLMServer(latency=LATENCY, respond=_respond).__enter__()
+_tmpdir = tempfile.mkdtemp()
+os.environ.setdefault(
+    "FACTCLI_DATABASE_URL", f"sqlite:///{Path(_tmpdir) / 'bench.sqlite3'}"
+)
+os.environ.update(
+    LLM="stub",
+    LLM_API_KEY="stub",
+    LLM_BASE_URL=_server.base_url,
+    LLM_CACHE="off",
+    LLM_GENERATION_MODE="batch",
+    DEDUP_ENABLED="false",
+)
+for name, value in {
+    "LLM_TIMEOUT": "0.5",
+    "LLM_DEADLINE": "1.5",
+    "LLM_RETRY_BASE_DELAY": "0.05",
+    "LLM_RETRY_MAX_DELAY": "0.4",
+    "LLM_BREAKER_THRESHOLD": "5",
+    "LLM_BREAKER_COOLDOWN": "1",
+}.items():
+    os.environ.setdefault(name, value)
+
+from sqlalchemy import insert  # noqa: E402
+
+from conf.database import SessionLocal, init_db  # noqa: E402
+from conf.env import LLM_BREAKER_COOLDOWN  # noqa: E402
+from models import Fact, User  # noqa: E402
+from app import fact_handler, metrics  # noqa: E402
+from app.agent import close_llm_clients  # noqa: E402
+from app.resilience import breaker  # noqa: E402
+
+# (name, error rate, latency): the hanging model answers after the deadline
+PHASES = [
+    ("healthy", 0.0, LATENCY),
+    ("flaky 30%", 0.3, LATENCY),
+    ("outage", 1.0, LATENCY),
+    ("recovered", 0.0, LATENCY),
+    ("hanging", 0.0, 5.0),
+]
+
+
+def _seed() -> int:
+    db = SessionLocal()
+    try:
+        db.execute(
+            insert(Fact),
+            [
+                {"category": "happy", "fact": f"Stored fact {i}.", "is_created_by_llm": False}
+                for i in range(SEED_FACTS)
+            ],
+        )
+        user = User(username="bench", password_hash="x")
+        db.add(user)
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+
+def _run(name: str, user_id: int, requests: int) -> None:
+    metrics.reset()
+    calls = _server.requests
+    start = time.perf_counter()
+    for _ in range(requests):
+        fact_handler.retrieve_fact("happy", user_id)
+    elapsed = time.perf_counter() - start
+    llm = metrics.counter("facts.route.llm")
+    fallback = metrics.counter("facts.route.fallback")
+    print(
+        f"{name:<10} {llm / requests:5.0%} LLM  {fallback / requests:5.0%} fallback  "
+        f"{_server.requests - calls:4d} model calls  "
+        f"{metrics.counter('llm.retries'):3d} retries  "
+        f"{elapsed / requests * 1000:6.0f} ms/request  breaker {breaker.state}"
+    )
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else REQUESTS
+    init_db()
+    user_id = _seed()
+    # Every request goes to the LLM, so each one exercises the resilience layer
+    fact_handler._pick_route = lambda category: ("llm", category)
+    print(f"{requests} requests per phase, {LATENCY * 1000:.0f} ms model latency")
+    try:
+        for name, error_rate, latency in PHASES:
+            _server.error_rate = error_rate
+            _server.latency = latency
+            if name == "recovered":
+                # Let the breaker's cooldown pass so the trial call is made
+                time.sleep(LLM_BREAKER_COOLDOWN)
+            _run(name, user_id, requests)
+    finally:
+        close_llm_clients()
+        _server.__exit__(None, None, None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Time to the first visible character of a generated fact, streamed or not.
+
+Each request generates a fact with the LLM, in both generation modes, once
+without streaming (nothing can be shown before the call returns) and once with
+an on_text callback, recording when it is first called. The model is a local
+stub OpenAI-compatible server that waits LATENCY seconds before its first token
+and TOKEN_LATENCY seconds between tokens of 4 characters, 50 tokens per second
+like a hosted model.
+
+    python -m benchmarks.streaming [REQUESTS]
+
+Uses a throwaway SQLite database unless FACTCLI_DATABASE_URL is already set.
+"""
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.stub_llm import StubLLMServer
+
+REQUESTS = 5
+LATENCY = 0.3
+TOKEN_LATENCY = 0.02
+_rng = random.Random(7)
+_vocabulary = [f"topic{i}" for i in range(5_000)]
+
+
+def _fact_text() -> str:
+    return "Did you know: " + " ".join(_rng.sample(_vocabulary, 10)) + "."
+
+
+def _respond(request: dict) -> dict:
+    """Answer like a cooperative model for both generation modes."""
+    last = request["messages"][-1]
+    if "response_format" in request:
+        k = int(re.search(r"Give me (\d+)", last["content"]).group(1))
+        return {"content": json.dumps({"facts": [_fact_text() for _ in range(k)]})}
+    if last["role"] == "tool":
+        return {"content": "Here is your fact."}
+    category = re.search(r"Generate a (\w+) fact", last["content"]).group(1)
+    user_id = int(re.search(r"user_id is: (\d+)", request["messages"][0]["content"]).group(1))
+    arguments = {"category": category, "fact_text": _fact_text(), "user_id": user_id}
+    return {
+        "content": None,
+        "tool_calls": [
+            {
+                "id": "call_add",
+                "type": "function",
+                "function": {"name": "add_llm_fact", "arguments": json.dumps(arguments)},
+            }
+        ],
+    }
+
+
+_server = StubLLMServer(
+    latency=LATENCY, respond=_respond, token_latency=TOKEN_LATENCY
+).__enter__()
+_tmpdir = tempfile.mkdtemp()
+os.environ.setdefault(
+    "FACTCLI_DATABASE_URL", f"sqlite:///{Path(_tmpdir) / 'bench.sqlite3'}"
+)
+# Every call must reach the model to be measured
+os.environ.update(
+    LLM="stub", LLM_API_KEY="stub", LLM_BASE_URL=_server.base_url, LLM_CACHE="off"
+)
+
+from conf.database import SessionLocal, init_db  # noqa: E402
+from conf.env import LLM_FACTS_PER_CALL  # noqa: E402
+from models import User  # noqa: E402
+from app.agent import close_llm_clients  # noqa: E402
+from app.fact_handler import _serve_from_agent, _serve_from_generation  # noqa: E402
+
+
+def _new_user(name: str) -> int:
+    db = SessionLocal()
+    try:
+        user = User(username=name, password_hash="x")
+        db.add(user)
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+
+def _run(name: str, serve, requests: int, stream: bool) -> None:
+    user_id = _new_user(f"bench-{name}-{stream}")
+    first_total = total = 0.0
+    for _ in range(requests):
+        first = None
+        start = time.perf_counter()
+
+        def on_text(text):
+            nonlocal first
+            if first is None:
+                first = time.perf_counter() - start
+
+        serve("happy", user_id, on_text=on_text if stream else None)
+        elapsed = time.perf_counter() - start
+        total += elapsed
+        first_total += elapsed if first is None else first
+
+    label = f"{name} {'streamed' if stream else 'blocking'}"
+    print(
+        f"{label:<15} first visible {first_total / requests * 1000:6.0f} ms  "
+        f"complete {total / requests * 1000:6.0f} ms"
+    )
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else REQUESTS
+    init_db()
+    print(
+        f"{requests} generated facts per run, {LATENCY * 1000:.0f} ms to first token, "
+        f"{TOKEN_LATENCY * 1000:.0f} ms/token, {LLM_FACTS_PER_CALL} facts per batch call"
+    )
+    try:
+        for stream in (False, True):
+            _run("agent", _serve_from_agent, requests, stream)
+            _run("batch", _serve_from_generation, requests, stream)
+    finally:
+        close_llm_clients()
+        _server.__exit__(None, None, None)
+
+
+if __name__ == "__main__":
+    main()
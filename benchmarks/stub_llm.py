@@ -0,0 +1,240 @@
+"""Minimal OpenAI-compatible chat completions server for local benchmarks.
+
+    with StubLLMServer(latency=0.05) as server:
+        ChatOpenAI(base_url=server.base_url, api_key="stub", model="stub")
+
+The server speaks HTTP/1.1 with keep-alive and counts the TCP connections it
+accepts, so callers can see whether clients reuse connections. By default every
+reply is the fixed text reply; pass respond(request) returning an assistant
+message dict (e.g. with tool_calls) to answer based on the request. Prompt and
+completion tokens are estimated at 4 characters per token and summed.
+
+Requests with "stream": true are answered with server-sent events: latency
+passes before the first token, then every 4-character token (of the content or
+of the tool call arguments) is sent token_latency apart. Other requests wait as
+long for the whole reply.
+
+To exercise retries and fallbacks, a share error_rate of the requests (seeded,
+so runs repeat) is answered with an error_status error after latency instead.
+Both latency and error_rate can be changed while the server runs, e.g. to
+simulate an outage or a hanging model. For a latency tail, a share slow_rate
+of the requests waits slow_latency instead of latency.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, *_args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = self.rfile.read(length)
+        with self.server.lock:
+            failed = self.server.rng.random() < self.server.error_rate
+            slow = self.server.slow_rate and self.server.rng.random() < self.server.slow_rate
+        latency = self.server.slow_latency if slow else self.server.latency
+        if failed:
+            self._fail(latency)
+            return
+        if self.server.respond is not None:
+            message = {"role": "assistant", **self.server.respond(json.loads(request))}
+        else:
+            message = {"role": "assistant", "content": self.server.reply}
+        prompt_tokens = len(request) // 4
+        completion_tokens = len(json.dumps(message)) // 4
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.prompt_tokens += prompt_tokens
+            self.server.completion_tokens += completion_tokens
+
+        if latency:
+            time.sleep(latency)
+        if json.loads(request).get("stream"):
+            self._stream(message)
+            return
+        if self.server.token_latency:
+            # Generation takes as long as when streamed, it is just not seen
+            text = (message.get("content") or "") + "".join(
+                call["function"]["arguments"] for call in message.get("tool_calls", [])
+            )
+            time.sleep(self.server.token_latency * -(-len(text) // 4))
+
+        body = json.dumps(
+            {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": "stub",
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": message,
+                        "finish_reason": "tool_calls" if message.get("tool_calls") else "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _fail(self, latency: float) -> None:
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.failures += 1
+        if latency:
+            time.sleep(latency)
+        body = json.dumps(
+            {"error": {"message": "injected failure", "type": "server_error", "code": None}}
+        ).encode()
+        self.send_response(self.server.error_status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, message: dict) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        deltas = [{"role": "assistant", "content": ""}]
+        content = message.get("content") or ""
+        deltas += [{"content": content[i:i + 4]} for i in range(0, len(content), 4)]
+        for index, call in enumerate(message.get("tool_calls", [])):
+            arguments = call["function"]["arguments"]
+            function = {"name": call["function"]["name"], "arguments": ""}
+            head = {"index": index, "id": call["id"], "type": "function", "function": function}
+            deltas.append({"tool_calls": [head]})
+            deltas += [
+                {"tool_calls": [{"index": index, "function": {"arguments": arguments[i:i + 4]}}]}
+                for i in range(0, len(arguments), 4)
+            ]
+        finish = "tool_calls" if message.get("tool_calls") else "stop"
+
+        for i, delta in enumerate(deltas):
+            if i > 1 and self.server.token_latency:
+                time.sleep(self.server.token_latency)
+            self._send_event({"index": 0, "delta": delta, "finish_reason": None})
+        self._send_event({"index": 0, "delta": {}, "finish_reason": finish})
+        self._send_chunk(b"data: [DONE]\n\n")
+        self._send_chunk(b"")
+
+    def _send_event(self, choice: dict) -> None:
+        event = {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": "stub",
+            "choices": [choice],
+        }
+        self._send_chunk(f"data: {json.dumps(event)}\n\n".encode())
+
+    def _send_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+class _Server(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients that time out close the connection while a reply is pending
+        pass
+
+
+class StubLLMServer:
+    def __init__(
+        self,
+        latency: float = 0.0,
+        reply: str = "ok",
+        respond=None,
+        token_latency: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        slow_rate: float = 0.0,
+        slow_latency: float = 0.0,
+        seed: int = 0,
+    ):
+        self.httpd = _Server(("127.0.0.1", 0), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.lock = threading.Lock()
+        self.httpd.connections = 0
+        self.httpd.requests = 0
+        self.httpd.latency = latency
+        self.httpd.token_latency = token_latency
+        self.httpd.reply = reply
+        self.httpd.respond = respond
+        self.httpd.prompt_tokens = 0
+        self.httpd.completion_tokens = 0
+        self.httpd.error_rate = error_rate
+        self.httpd.error_status = error_status
+        self.httpd.failures = 0
+        self.httpd.slow_rate = slow_rate
+        self.httpd.slow_latency = slow_latency
+        self.httpd.rng = random.Random(seed)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+
+    @property
+    def connections(self) -> int:
+        return self.httpd.connections
+
+    @property
+    def requests(self) -> int:
+        return self.httpd.requests
+
+    @property
+    def latency(self) -> float:
+        return self.httpd.latency
+
+    @latency.setter
+    def latency(self, seconds: float) -> None:
+        self.httpd.latency = seconds
+
+    @property
+    def failures(self) -> int:
+        return self.httpd.failures
+
+    @property
+    def error_rate(self) -> float:
+        return self.httpd.error_rate
+
+    @error_rate.setter
+    def error_rate(self, rate: float) -> None:
+        self.httpd.error_rate = rate
+
+    @property
+    def tokens(self) -> tuple[int, int]:
+        """(prompt, completion) tokens over all requests so far."""
+        return self.httpd.prompt_tokens, self.httpd.completion_tokens
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *_exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
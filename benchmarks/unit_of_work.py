@@ -0,0 +1,96 @@
+"""Count database round trips, commits and connection checkouts per fact request.
+
+Serves REQUESTS facts from the database route, first calling the helpers one
+by one as separate sessions (how a request ran before), then through
+_serve_from_db, which wraps them in one unit of work.
+
+    python -m benchmarks.unit_of_work [REQUESTS]
+
+Uses a throwaway SQLite database unless FACTCLI_DATABASE_URL is already set.
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+_tmpdir = tempfile.mkdtemp()
+os.environ.setdefault(
+    "FACTCLI_DATABASE_URL", f"sqlite:///{Path(_tmpdir) / 'bench.sqlite3'}"
+)
+
+from sqlalchemy import event, insert  # noqa: E402
+
+from conf.database import SessionLocal, engine, init_db  # noqa: E402
+from models import Fact, User  # noqa: E402
+from app.facts import add_user_fact, get_fact_from_db  # noqa: E402
+from app.fact_handler import _serve_from_db  # noqa: E402
+
+REQUESTS = 500
+
+counts = {"statements": 0, "commits": 0, "checkouts": 0}
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count_statement(*_):
+    counts["statements"] += 1
+
+
+@event.listens_for(engine, "commit")
+def _count_commit(*_):
+    counts["commits"] += 1
+
+
+@event.listens_for(engine.pool, "checkout")
+def _count_checkout(*_):
+    counts["checkouts"] += 1
+
+
+def _per_helper(category: str, user_id: int) -> None:
+    fact = get_fact_from_db(category, user_id)
+    add_user_fact(user_id=user_id, fact_id=fact["fact_id"])
+
+
+def _seed(requests: int) -> list[int]:
+    db = SessionLocal()
+    try:
+        db.execute(
+            insert(Fact),
+            [
+                {"category": "happy", "fact": f"fact {i}", "is_created_by_llm": True}
+                for i in range(requests * 2)
+            ],
+        )
+        users = [User(username=f"bench-{name}", password_hash="x") for name in ("a", "b")]
+        db.add_all(users)
+        db.commit()
+        return [u.id for u in users]
+    finally:
+        db.close()
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else REQUESTS
+    init_db()
+    user_ids = _seed(requests)
+
+    print(f"{requests} database-route fact requests")
+    for name, serve, user_id in (
+        ("session per helper", _per_helper, user_ids[0]),
+        ("unit of work", _serve_from_db, user_ids[1]),
+    ):
+        for key in counts:
+            counts[key] = 0
+        start = time.perf_counter()
+        for _ in range(requests):
+            serve("happy", user_id)
+        ms = (time.perf_counter() - start) / requests * 1000
+        print(
+            f"{name:<19} {counts['statements'] / requests:5.1f} statements  "
+            f"{counts['commits'] / requests:4.1f} commits  "
+            f"{counts['checkouts'] / requests:4.1f} checkouts  {ms:6.2f} ms/request"
+        )
+
+
+if __name__ == "__main__":
+    main()
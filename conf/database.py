@@ -1,20 +1,249 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
-
-from conf.env import DATABASE_URL
+import hashlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Iterator
 
+from sqlalchemy import (
+    Column,
+    MetaData,
+    String,
+    Table,
+    create_engine,
+    delete,
+    event,
+    insert,
+    select,
+    text,
+)
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
 
-engine = create_engine(
+from conf.env import (
     DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
-    echo=False,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    SQLITE_BUSY_TIMEOUT,
+    SQLITE_CACHE_SIZE,
+    SQLITE_JOURNAL_MODE,
+    SQLITE_MMAP_SIZE,
+    SQLITE_SYNCHRONOUS,
 )
+
+
+def sqlite_pragmas() -> dict:
+    """PRAGMAs set on each new SQLite connection, from conf.env."""
+    return {
+        "journal_mode": SQLITE_JOURNAL_MODE,
+        "synchronous": SQLITE_SYNCHRONOUS,
+        "busy_timeout": SQLITE_BUSY_TIMEOUT,
+        "mmap_size": SQLITE_MMAP_SIZE,
+        "cache_size": SQLITE_CACHE_SIZE,
+    }
+
+
+def make_engine(url: str, pragmas: dict | None = None) -> Engine:
+    """Create an engine configured for the database behind url.
+
+    The connection pool is sized from conf.env. Server databases also get
+    pre-ping and recycling, so connections dropped by the server or a proxy are
+    replaced instead of failing a request. SQLite connections get the given
+    PRAGMAs (sqlite_pragmas() by default): WAL lets readers run alongside a
+    writer and busy_timeout makes writers wait for the lock instead of failing
+    with "database is locked".
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        return create_engine(
+            url,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+            echo=False,
+        )
+
+    if pragmas is None:
+        pragmas = sqlite_pragmas()
+    if parsed.database in (None, "", ":memory:"):
+        # In-memory databases use a single connection per thread and have no
+        # journal file to put in WAL mode
+        pool_options = {}
+        pragmas = {k: v for k, v in pragmas.items() if k != "journal_mode"}
+    else:
+        pool_options = {
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+        }
+    new_engine = create_engine(
+        url, connect_args={"check_same_thread": False}, echo=False, **pool_options
+    )
+
+    @event.listens_for(new_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    return new_engine
+
+engine = make_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Session of the unit of work running in the current context, if any
+_current_session: ContextVar[Session | None] = ContextVar("db_session", default=None)
+
+
+@contextmanager
+def unit_of_work() -> Iterator[Session]:
+    """Run a block of database work on one session, connection and transaction.
+
+    The block commits when it exits, or rolls back on error. A unit of work
+    opened while another is active joins it instead, leaving the commit to the
+    outermost one; the helpers in app.facts open one each, so wrapping a whole
+    request in unit_of_work() makes it one transaction. The session is tracked
+    in a context variable, so it only covers the current thread or task.
+    """
+    db = _current_session.get()
+    if db is not None:
+        yield db
+        return
+
+    db = SessionLocal()
+    token = _current_session.set(db)
+    try:
+        yield db
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    finally:
+        _current_session.reset(token)
+        db.close()
+
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+# Revision matching the schema create_all made before new databases were stamped
+UNTRACKED_REVISION = "a762a07b300a"
+
+# Bookkeeping table holding the fingerprint of the schema init_db last created.
+# It lives outside Base.metadata so it is not part of the models or migrations.
+schema_state = Table(
+    "schema_state", MetaData(), Column("fingerprint", String, primary_key=True)
+)
+
+_db_ready = False
+
+
+def schema_fingerprint() -> str:
+    """Hash of the tables, columns, indexes and constraints the models define."""
+    parts = []
+    for table in sorted(Base.metadata.tables.values(), key=lambda t: t.name):
+        parts.append(f"table {table.name}")
+        for column in table.columns:
+            parts.append(f"column {column.name} {column.type} {column.nullable}")
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            parts.append(f"index {index.name} {[c.name for c in index.columns]}")
+        for constraint in sorted(table.constraints, key=lambda c: str(c.name)):
+            parts.append(f"constraint {constraint.name} {[c.name for c in constraint.columns]}")
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+def _stored_fingerprint() -> str | None:
+    try:
+        with engine.connect() as conn:
+            return conn.execute(select(schema_state.c.fingerprint)).scalar()
+    except SQLAlchemyError:
+        return None
+
 
 def init_db():
+    """Make sure the schema exists, doing DDL only when the models changed.
+
+    The fast path is a single SELECT of the stored schema fingerprint, and the
+    result is remembered for the rest of the process. A brand new database is
+    created from the models and stamped with the latest Alembic revision, so
+    `factscli db upgrade` works on it later. Any other database is upgraded
+    instead: create_all would add new tables that the migrations then fail to
+    create, and never adds or drops indexes on existing tables.
+    """
+    global _db_ready
+    if _db_ready:
+        return
+
     # Import models to register them before creating tables
     from models import User, Fact, SessionToken  # noqa: F401
 
-    Base.metadata.create_all(bind=engine)
+    fingerprint = schema_fingerprint()
+    if _stored_fingerprint() == fingerprint:
+        _db_ready = True
+        return
+
+    with engine.connect() as conn:
+        is_new = not engine.dialect.has_table(conn, User.__tablename__)
+
+    if is_new:
+        Base.metadata.create_all(bind=engine)
+    else:
+        upgrade_db(quiet=True)
+    schema_state.create(bind=engine, checkfirst=True)
+    with engine.begin() as conn:
+        conn.execute(delete(schema_state))
+        conn.execute(insert(schema_state).values(fingerprint=fingerprint))
+
+    if is_new:
+        stamp_db()
+    _db_ready = True
+
+
+def _alembic_revision(conn) -> str | None:
+    """The revision stamped in alembic_version, or None if there is none."""
+    if not engine.dialect.has_table(conn, "alembic_version"):
+        return None
+    return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+
+
+def _alembic_config(quiet: bool = False):
+    from alembic.config import Config
+
+    config = Config(str(ALEMBIC_INI))
+    if quiet:
+        config.attributes["configure_logger"] = False
+    return config
+
+
+def upgrade_db(revision: str = "head", quiet: bool = False) -> None:
+    """Apply Alembic migrations up to the given revision.
+
+    A database with tables but no Alembic revision was made by create_all
+    before new databases were stamped; it is stamped with UNTRACKED_REVISION
+    first, so the later migrations run on it. quiet keeps Alembic's log output
+    out of normal commands.
+    """
+    from alembic import command
+
+    with engine.connect() as conn:
+        untracked = (
+            engine.dialect.has_table(conn, "users") and _alembic_revision(conn) is None
+        )
+    if untracked:
+        stamp_db(UNTRACKED_REVISION)
+    command.upgrade(_alembic_config(quiet), revision)
+
+
+def stamp_db(revision: str = "head") -> None:
+    """Mark the database as being at the given revision without running migrations."""
+    from alembic import command
+
+    command.stamp(_alembic_config(quiet=True), revision)
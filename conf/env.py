@@ -8,9 +8,120 @@ load_dotenv()
 DEFAULT_SQLITE = f"sqlite:///{Path('database.sqlite3').absolute()}"
 DATABASE_URL = os.environ.get("FACTCLI_DATABASE_URL", DEFAULT_SQLITE)
 
+# DATABASE ENGINE
+# Connection pool (server databases such as PostgreSQL)
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true").lower() == "true"
+# PRAGMAs applied to every SQLite connection
+SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT = int(os.environ.get("SQLITE_BUSY_TIMEOUT", "5000"))  # ms
+SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Negative values are KiB, positive values are pages
+SQLITE_CACHE_SIZE = int(os.environ.get("SQLITE_CACHE_SIZE", "-64000"))
+
 KEYRING_PASSWORD = os.environ.get("KEYRING_PASSWORD")
 
+# Local cache of the logged-in user, so commands skip the keyring and DB lookup.
+# Set the TTL to 0 to disable it.
+SESSION_CACHE_PATH = os.environ.get(
+    "SESSION_CACHE_PATH", str(Path.home() / ".cache" / "factscli" / "session.json")
+)
+SESSION_CACHE_TTL = int(os.environ.get("SESSION_CACHE_TTL", "300"))
+
+# PASSWORD HASHING
+# Argon2 cost profile: low, medium or high (see app/passwords.py)
+PASSWORD_HASH_PROFILE = os.environ.get("PASSWORD_HASH_PROFILE", "high")
+# Hashes computed at the same time; each one holds the profile's memory cost
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", "2"))
+
 # LLM CONFIG
 LLM = os.environ.get("LLM")
 LLM_API_KEY = os.environ.get("LLM_API_KEY")
 LLM_BASE_URL = os.environ.get("LLM_BASE_URL")
+
+# LLM HTTP CLIENT
+LLM_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", "60"))
+LLM_CONNECT_TIMEOUT = float(os.environ.get("LLM_CONNECT_TIMEOUT", "10"))
+LLM_MAX_CONNECTIONS = int(os.environ.get("LLM_MAX_CONNECTIONS", "10"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("LLM_MAX_KEEPALIVE_CONNECTIONS", "5"))
+LLM_KEEPALIVE_EXPIRY = float(os.environ.get("LLM_KEEPALIVE_EXPIRY", "30"))
+
+# LLM RESILIENCE
+# Time one fact request may take, over all model turns, retries and backoff
+LLM_DEADLINE = float(os.environ.get("LLM_DEADLINE", "60"))
+# Retries of a model call after a 429, 5xx, connection error or timeout. The
+# delay doubles from LLM_RETRY_BASE_DELAY up to LLM_RETRY_MAX_DELAY, with jitter
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "3"))
+LLM_RETRY_BASE_DELAY = float(os.environ.get("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_RETRY_MAX_DELAY = float(os.environ.get("LLM_RETRY_MAX_DELAY", "8"))
+# After this many consecutive failed model calls the LLM is skipped, and facts
+# are served from the database, for LLM_BREAKER_COOLDOWN seconds
+LLM_BREAKER_THRESHOLD = int(os.environ.get("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_COOLDOWN = float(os.environ.get("LLM_BREAKER_COOLDOWN", "30"))
+# Model turns per agent request; a model still calling tools after that is stopped
+AGENT_MAX_ITERATIONS = int(os.environ.get("AGENT_MAX_ITERATIONS", "3"))
+
+# LLM HEDGING
+# OpenAI-compatible providers to send model calls to, in order of preference:
+# comma-separated model@base_url entries (e.g. "gpt-4o-mini@https://api.openai.com/v1,
+# llama3.1@http://localhost:11434/v1"). Empty means LLM at LLM_BASE_URL only.
+# API keys are taken by position from LLM_PROVIDER_API_KEYS, else LLM_API_KEY
+LLM_PROVIDERS = os.environ.get("LLM_PROVIDERS", "")
+LLM_PROVIDER_API_KEYS = os.environ.get("LLM_PROVIDER_API_KEYS", "")
+# With several providers, a call the primary has not answered within its
+# LLM_HEDGE_PERCENTILE latency is also sent to the next provider; the first
+# answer wins. LLM_HEDGE_DELAY is used until LLM_HEDGE_MIN_SAMPLES latencies
+# are known, and the delay never drops below LLM_HEDGE_MIN_DELAY
+LLM_HEDGE_ENABLED = os.environ.get("LLM_HEDGE_ENABLED", "true").lower() == "true"
+LLM_HEDGE_PERCENTILE = float(os.environ.get("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_DELAY = float(os.environ.get("LLM_HEDGE_DELAY", "2"))
+LLM_HEDGE_MIN_DELAY = float(os.environ.get("LLM_HEDGE_MIN_DELAY", "0.05"))
+LLM_HEDGE_MIN_SAMPLES = int(os.environ.get("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+# LLM RESPONSE CACHE
+# Responses to identical model inputs are reused: "memory" keeps them in the
+# process, "sqlite" in a file at LLM_CACHE_PATH shared across runs, "off"
+# (the default) disables the cache
+LLM_CACHE = os.environ.get("LLM_CACHE", "off").lower()
+LLM_CACHE_PATH = os.environ.get(
+    "LLM_CACHE_PATH", str(Path.home() / ".cache" / "factscli" / "llm_cache.sqlite3")
+)
+LLM_CACHE_TTL = int(os.environ.get("LLM_CACHE_TTL", "86400"))  # seconds
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "1000"))
+# With true, calls sampled at temperature > 0 are cached too, so the same
+# answer is replayed instead of a new sample. The models are sampled at 0.7, so
+# without it nothing is cached. Routes that generate new facts for users never
+# use the cache
+LLM_CACHE_SAMPLED = os.environ.get("LLM_CACHE_SAMPLED", "false").lower() == "true"
+
+# LLM FACT GENERATION
+# "batch" asks for LLM_FACTS_PER_CALL facts in one structured-output call and
+# stores them all for later serving; "agent" has the tool-calling agent store
+# one fact per request, which takes two model turns
+LLM_GENERATION_MODE = os.environ.get("LLM_GENERATION_MODE", "batch").lower()
+LLM_FACTS_PER_CALL = int(os.environ.get("LLM_FACTS_PER_CALL", "5"))
+
+# AGENT CONTEXT
+# Upper bound on the "already told" facts put into the system prompt
+KNOWN_FACTS_TOKEN_BUDGET = int(os.environ.get("KNOWN_FACTS_TOKEN_BUDGET", "400"))
+KNOWN_FACTS_MAX_ITEMS = int(os.environ.get("KNOWN_FACTS_MAX_ITEMS", "50"))
+
+# FACT TEXT CACHE
+# Memory bound of the in-process LRU of fact text by id; 0 disables it
+FACT_CACHE_MAX_BYTES = int(os.environ.get("FACT_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+# NEAR-DUPLICATE DETECTION
+# New facts whose content words overlap an existing fact's by at least
+# DEDUP_THRESHOLD (Jaccard similarity) are treated as duplicates
+DEDUP_ENABLED = os.environ.get("DEDUP_ENABLED", "true").lower() == "true"
+DEDUP_THRESHOLD = float(os.environ.get("DEDUP_THRESHOLD", "0.6"))
+
+# LLM FACT PREFETCHING (shell and TUI sessions)
+PREFETCH_ENABLED = os.environ.get("PREFETCH_ENABLED", "true").lower() == "true"
+PREFETCH_LOW_WATERMARK = int(os.environ.get("PREFETCH_LOW_WATERMARK", "2"))
+PREFETCH_HIGH_WATERMARK = int(os.environ.get("PREFETCH_HIGH_WATERMARK", "5"))
+PREFETCH_MAX_CONCURRENCY = int(os.environ.get("PREFETCH_MAX_CONCURRENCY", "2"))
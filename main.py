@@ -1,34 +1,24 @@
+import json
+import sys
 import typer
-import keyring
 from typer import Option
-from keyrings.cryptfile.cryptfile import CryptFileKeyring
-
-from tui import FactsTUI
-from conf.database import init_db
-from conf.env import KEYRING_PASSWORD
-from app.auth import get_local_token, logout, signup
-from app.cli import (
-    get_fact,
-    get_user,
-    add_fact_from_user,
-    interactive_shell,
-    retrieve_history,
-    login_user,
-)
-
-app_keyring = CryptFileKeyring()
-app_keyring.keyring_key = KEYRING_PASSWORD
-keyring.set_keyring(app_keyring)
-
-_ = get_local_token()
+
+# Commands import what they need when they run, so lightweight commands such
+# as whoami or history don't pay for the TUI, the LLM stack or the keyring.
 
 app = typer.Typer(help="FactsCLI")
+db_app = typer.Typer(help="Database maintenance")
+app.add_typer(db_app, name="db")
 
 
 @app.callback(invoke_without_command=True)
 def startup(ctx: typer.Context):
     """Initializes the database and checks for TUI command."""
-    init_db()
+    from conf.database import init_db
+
+    # Maintenance commands manage the schema themselves
+    if ctx.invoked_subcommand != "db":
+        init_db()
     if ctx.invoked_subcommand is None:
         typer.echo(
             "Use `factscli ui` for the TUI, `factscli shell` for interactive CLI, or run subcommands. Use --help for options."
@@ -39,14 +29,27 @@ def startup(ctx: typer.Context):
 @app.command()
 def ui():
     """Starts the Text User Interface (TUI)."""
-    FactsTUI().run()
+    from tui import FactsTUI
+    from app.fact_handler import start_prefetcher, stop_prefetcher
+
+    start_prefetcher()
+    try:
+        FactsTUI().run()
+    finally:
+        stop_prefetcher()
 
 
 @app.command()
 def shell():
     """Starts an interactive CLI shell session."""
-    init_db()
-    interactive_shell()
+    from app.cli import interactive_shell
+    from app.fact_handler import start_prefetcher, stop_prefetcher
+
+    start_prefetcher()
+    try:
+        interactive_shell()
+    finally:
+        stop_prefetcher()
 
 
 @app.command()
@@ -55,7 +58,9 @@ def signup(
     password: str = Option(..., "--fact", "-f", help="Password"),
 ):
     """Signs up the user."""
-    if signup(username, password):
+    from app.auth import signup as signup_user
+
+    if signup_user(username, password):
         typer.echo("Signup successful! You can now login.")
     else:
         typer.echo("Username taken. Try another.")
@@ -66,6 +71,8 @@ def login(
     username: str = Option(..., "--category", "-c", help="Username"),
     password: str = Option(..., "--fact", "-f", help="Password"),
 ):
+    from app.cli import login_user
+
     if login_user(username, password):
         typer.echo(f"Welcome, {username}!")
     else:
@@ -75,6 +82,8 @@ def login(
 @app.command()
 def happy():
     """Gets a random 'happy' fact."""
+    from app.cli import get_fact
+
     fact = get_fact(category="happy")
     typer.echo(fact)
 
@@ -82,6 +91,8 @@ def happy():
 @app.command()
 def sad():
     """Gets a random 'sad' fact."""
+    from app.cli import get_fact
+
     fact = get_fact(category="sad")
     typer.echo(fact)
 
@@ -89,15 +100,50 @@ def sad():
 @app.command()
 def random():
     """Gets a random fact from any category."""
+    from app.cli import get_fact
+
     fact = get_fact(category="random")
     typer.echo(fact)
 
 
 @app.command()
-def history():
+def batch(
+    n: int = Option(10, "-n", min=1, help="Number of facts"),
+    category: str = Option("random", "--category", "-c", help="happy, sad or random"),
+):
+    """Prints N unseen facts as JSON lines."""
+    if category not in ["happy", "sad", "random"]:
+        typer.echo("Invalid category. Use: happy, sad, random")
+        raise typer.Exit(1)
+
+    from app.cli import get_facts
+
+    for fact in get_facts(category=category, n=n):
+        typer.echo(json.dumps(fact))
+
+
+@app.command()
+def history(
+    limit: int = Option(None, "--limit", "-n", min=1, help="Facts per page (default: all)"),
+    page: int = Option(1, "--page", "-p", min=1, help="Page number, newest first"),
+    count: bool = Option(False, "--count", help="Only print how many facts you have seen"),
+):
     """Get user's history"""
-    history = retrieve_history()
-    typer.echo(history)
+    from app.cli import retrieve_history, retrieve_history_count
+
+    if count:
+        typer.echo(retrieve_history_count())
+        return
+    if page > 1 and limit is None:
+        typer.echo("--page needs --limit")
+        raise typer.Exit(1)
+
+    empty = True
+    for line in retrieve_history(limit=limit, page=page):
+        typer.echo(line)
+        empty = False
+    if empty:
+        typer.echo("No history yet")
 
 
 @app.command()
@@ -106,13 +152,23 @@ def add(
     fact: str = Option(..., "--fact", "-f", help="Fact text"),
 ):
     """Adds a new fact to a specified category."""
-    ok = add_fact_from_user(category, fact)
-    typer.echo("Fact added!" if ok else "Invalid category. Use: happy, sad")
+    from app.cli import add_fact_from_user
+    from app.facts import ADDED, DUPLICATE
+
+    result = add_fact_from_user(category, fact)
+    if result == ADDED:
+        typer.echo("Fact added!")
+    elif result == DUPLICATE:
+        typer.echo("A very similar fact already exists.")
+    else:
+        typer.echo("Invalid category. Use: happy, sad")
 
 
 @app.command()
 def whoami():
     """Displays the currently logged-in user."""
+    from app.cli import get_user
+
     user = get_user()
     if not user:
         typer.echo("Session invalid")
@@ -123,10 +179,116 @@ def whoami():
 @app.command()
 def signout():
     """Signs out the current user by deleting the session token."""
+    from app.auth import get_local_token, logout
+
     token = get_local_token()
     logout(token)
     typer.echo("Signed out (if there was a session).")
 
 
+def _file_format(path: str, fmt: str | None) -> str:
+    from app.fact_io import FORMATS
+
+    fmt = fmt or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    if fmt not in FORMATS:
+        typer.echo("Invalid format. Use: csv, jsonl")
+        raise typer.Exit(1)
+    return fmt
+
+
+@app.command(name="import")
+def import_cmd(
+    path: str = typer.Argument(..., help="CSV or JSONL file with category and fact columns"),
+    fmt: str = Option(None, "--format", help="csv or jsonl (default: from extension)"),
+    batch_size: int = Option(5000, "--batch-size", min=1, help="Rows per transaction"),
+):
+    """Bulk imports facts from a CSV or JSONL file."""
+    from app.fact_io import import_facts
+
+    fmt = _file_format(path, fmt)
+
+    def progress(imported: int, skipped: int):
+        typer.echo(f"\rImported {imported}, skipped {skipped}", nl=False, err=True)
+
+    with open(path, newline="", encoding="utf-8") as f:
+        imported, skipped = import_facts(f, fmt, batch_size=batch_size, progress=progress)
+    typer.echo(err=True)
+    typer.echo(f"Imported {imported} fact(s), skipped {skipped} invalid or duplicate row(s).")
+
+
+@app.command(name="export")
+def export_cmd(
+    path: str = typer.Argument("-", help="Output file, or - for stdout"),
+    fmt: str = Option(None, "--format", help="csv or jsonl (default: from extension)"),
+    category: str = Option(None, "--category", "-c", help="Only export this category"),
+):
+    """Exports facts to a CSV or JSONL file."""
+    from app.fact_io import export_facts
+
+    fmt = _file_format(path, fmt)
+    if path == "-":
+        export_facts(sys.stdout, fmt, category=category)
+        return
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        count = export_facts(f, fmt, category=category)
+    typer.echo(f"Exported {count} fact(s) to {path}.")
+
+
+@app.command(name="rebuild-pools")
+def rebuild_pools_cmd():
+    """Rebuilds every user's pool of unseen facts."""
+    from app.fact_pool import rebuild_pools
+
+    count = rebuild_pools()
+    typer.echo(f"Rebuilt {count} fact pool(s).")
+
+
+@app.command(name="rebuild-dedup-index")
+def rebuild_dedup_index_cmd():
+    """Rebuilds the near-duplicate index from the facts table."""
+    from app.dedup import rebuild_dedup_index
+
+    count = rebuild_dedup_index()
+    typer.echo(f"Indexed {count} fact(s).")
+
+
+@app.command(name="check-pools")
+def check_pools_cmd(
+    repair: bool = Option(False, "--repair", help="Delete inconsistent entries"),
+):
+    """Checks unseen fact pools against the facts users have already seen."""
+    from app.fact_pool import check_pools
+
+    count = check_pools(repair=repair)
+    if not count:
+        typer.echo("Fact pools are consistent.")
+    elif repair:
+        typer.echo(f"Removed {count} inconsistent pool entr{'y' if count == 1 else 'ies'}.")
+    else:
+        typer.echo(f"Found {count} inconsistent pool entr{'y' if count == 1 else 'ies'}. Run with --repair to fix.")
+
+
+@db_app.command("upgrade")
+def db_upgrade(
+    revision: str = typer.Argument("head", help="Target Alembic revision"),
+):
+    """Applies database migrations."""
+    from conf.database import upgrade_db
+
+    upgrade_db(revision)
+    typer.echo(f"Database upgraded to {revision}.")
+
+
+@db_app.command("stamp")
+def db_stamp(
+    revision: str = typer.Argument("head", help="Revision the database is at"),
+):
+    """Marks the database as migrated to a revision without running migrations."""
+    from conf.database import stamp_db
+
+    stamp_db(revision)
+    typer.echo(f"Database stamped at {revision}.")
+
+
 if __name__ == "__main__":
     app()
@@ -0,0 +1,50 @@
+"""Unseen fact pools
+
+Revision ID: 5c81e0f3a9d2
+Revises: a762a07b300a
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c81e0f3a9d2'
+down_revision: Union[str, Sequence[str], None] = 'a762a07b300a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('fact_pools',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('category', sa.String(), nullable=False),
+    sa.Column('built_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'category', name='uix_fact_pool')
+    )
+    op.create_table('unseen_facts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('category', sa.String(), nullable=False),
+    sa.Column('fact_id', sa.Integer(), nullable=False),
+    sa.Column('sort_key', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['fact_id'], ['facts.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'fact_id', name='uix_unseen_fact')
+    )
+    op.create_index('ix_unseen_facts_queue', 'unseen_facts', ['user_id', 'category', 'sort_key'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_unseen_facts_queue', table_name='unseen_facts')
+    op.drop_table('unseen_facts')
+    op.drop_table('fact_pools')
@@ -0,0 +1,55 @@
+"""Composite indexes for hot queries, drop redundant indexes
+
+Revision ID: 8e4b1d6c2f70
+Revises: 5c81e0f3a9d2
+Create Date: 2026-10-18 16:04:27.540913
+
+Existing databases only get these indexes from this migration; init_db
+applies it, including to databases create_all made before they were stamped.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e4b1d6c2f70'
+down_revision: Union[str, Sequence[str], None] = '5c81e0f3a9d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Indexes on primary keys duplicate the primary key index, and the single
+# column ones below are prefixes of the new composite indexes or of uix_user_fact.
+REDUNDANT = [
+    ('ix_facts_id', 'facts', ['id']),
+    ('ix_facts_category', 'facts', ['category']),
+    ('ix_users_id', 'users', ['id']),
+    ('ix_sessions_id', 'sessions', ['id']),
+    ('ix_user_facts_id', 'user_facts', ['id']),
+    ('ix_user_facts_user_id', 'user_facts', ['user_id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_facts_category_id', 'facts', ['category', 'id'], unique=False)
+    op.create_index(
+        'ix_user_facts_history',
+        'user_facts',
+        ['user_id', sa.text('created_at DESC'), 'fact_id'],
+        unique=False,
+    )
+    op.create_index('ix_fact_pools_category', 'fact_pools', ['category'], unique=False)
+    for name, table, _ in REDUNDANT:
+        # Created by create_all rather than a migration, so they may be missing
+        op.drop_index(name, table_name=table, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, columns in reversed(REDUNDANT):
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+    op.drop_index('ix_fact_pools_category', table_name='fact_pools')
+    op.drop_index('ix_user_facts_history', table_name='user_facts')
+    op.drop_index('ix_facts_category_id', table_name='facts')
@@ -0,0 +1,36 @@
+"""Near-duplicate index
+
+Revision ID: b3f9a7e21c54
+Revises: 8e4b1d6c2f70
+Create Date: 2026-10-18 17:21:09.803412
+
+Existing facts are not indexed by the migration; run
+`factscli rebuild-dedup-index` afterwards.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f9a7e21c54'
+down_revision: Union[str, Sequence[str], None] = '8e4b1d6c2f70'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('dedup_buckets',
+    sa.Column('bucket', sa.BigInteger(), autoincrement=False, nullable=False),
+    sa.Column('fact_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.ForeignKeyConstraint(['fact_id'], ['facts.id'], ),
+    sa.PrimaryKeyConstraint('bucket', 'fact_id'),
+    sqlite_with_rowid=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('dedup_buckets')
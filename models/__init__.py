@@ -1,4 +1,6 @@
 from .user import User
 from .fact import Fact
 from .session_token import SessionToken
-from .user_fact import UserFact
\ No newline at end of file
+from .user_fact import UserFact
+from .fact_pool import FactPool, UnseenFact
+from .dedup_bucket import DedupBucket
\ No newline at end of file
@@ -0,0 +1,17 @@
+from sqlalchemy import BigInteger, Column, ForeignKey, Integer
+
+from conf.database import Base
+
+
+class DedupBucket(Base):
+    """One LSH bucket of a fact's MinHash signature, used to find near-duplicates.
+
+    The bucket key already encodes the category and band, so the primary key is
+    the only index a lookup needs. On SQLite the rows live in that index itself.
+    """
+
+    __tablename__ = "dedup_buckets"
+    bucket = Column(BigInteger, primary_key=True, autoincrement=False)
+    fact_id = Column(Integer, ForeignKey("facts.id"), primary_key=True, autoincrement=False)
+
+    __table_args__ = ({"sqlite_with_rowid": False},)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -7,13 +7,16 @@ from conf.database import Base
 
 class Fact(Base):
     __tablename__ = "facts"
-    id = Column(Integer, primary_key=True, index=True)
-    category = Column(String, index=True, nullable=False)
+    id = Column(Integer, primary_key=True)
+    category = Column(String, nullable=False)
     fact = Column(Text, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=True)
     is_created_by_llm = Column(Boolean, nullable=False, default=False)
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
 
+    # Serves category filters ordered or ranged by id without touching the table
+    __table_args__ = (Index("ix_facts_category_id", "category", "id"),)
+
     added_by = relationship("User", back_populates="created_facts")
     user_facts = relationship("UserFact", back_populates="fact")
@@ -0,0 +1,45 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Float,
+    DateTime,
+    ForeignKey,
+    Index,
+    UniqueConstraint,
+)
+from datetime import datetime
+
+from conf.database import Base
+
+
+class FactPool(Base):
+    """Marks that the unseen pool for a (user, category) has been built."""
+
+    __tablename__ = "fact_pools"
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    category = Column(String, nullable=False)
+    built_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "category", name="uix_fact_pool"),
+        # New facts are queued into every pool of their category
+        Index("ix_fact_pools_category", "category"),
+    )
+
+
+class UnseenFact(Base):
+    """A fact waiting to be served to a user, in shuffled order."""
+
+    __tablename__ = "unseen_facts"
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    category = Column(String, nullable=False)
+    fact_id = Column(Integer, ForeignKey("facts.id"), nullable=False)
+    sort_key = Column(Float, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "fact_id", name="uix_unseen_fact"),
+        Index("ix_unseen_facts_queue", "user_id", "category", "sort_key"),
+    )
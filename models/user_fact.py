@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -7,13 +7,17 @@ from conf.database import Base
 
 class UserFact(Base):
     __tablename__ = "user_facts"
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     fact_id = Column(Integer, ForeignKey("facts.id"), index=True, nullable=False)
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
 
-    __table_args__ = (UniqueConstraint("user_id", "fact_id", name="uix_user_fact"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "fact_id", name="uix_user_fact"),
+        # A user's history, newest first, without a sort or a table lookup
+        Index("ix_user_facts_history", user_id, created_at.desc(), fact_id),
+    )
 
     user = relationship("User", back_populates="user_facts")
     fact = relationship("Fact", back_populates="user_facts")
@@ -2,7 +2,7 @@ from textual.screen import Screen
 from textual.widgets import Button, Input, Static
 from textual.containers import Vertical
 
-from app.facts import add_fact
+from app.facts import ADDED, DUPLICATE, add_fact
 
 
 class AddFactScreen(Screen):
@@ -34,11 +34,16 @@ class AddFactScreen(Screen):
                 self.app.bell()
                 return
 
-            success = add_fact(category, fact, self.app.user_id)
-            if success:
+            result = add_fact(category, fact, self.app.user_id)
+            if result == ADDED:
                 self.query_one("#message", Static).update("Fact added! ✅")
                 self.query_one("#category", Input).value = ""
                 self.query_one("#fact", Input).value = ""
+            elif result == DUPLICATE:
+                self.query_one("#message", Static).update(
+                    "A very similar fact already exists."
+                )
+                self.app.bell()
             else:
                 self.query_one("#message", Static).update(
                     "Invalid category. Use: happy, sad, fun"
@@ -0,0 +1,81 @@
+from rich.text import Text
+from textual.screen import Screen
+from textual.widgets import Button, OptionList, Static
+from textual.containers import Vertical
+
+from app.facts import get_user_history_page
+from app.fact_handler import run_blocking
+
+PAGE_SIZE = 50
+# Start loading the next page when this many entries are left below the view
+PREFETCH_MARGIN = 10
+
+
+class HistoryScreen(Screen):
+    """The user's history, newest first, fetched a page at a time while scrolling.
+
+    OptionList only renders the lines in view, so long histories stay cheap to
+    display, and each page is one keyset query continuing from the last entry.
+    """
+
+    def compose(self):
+        yield Vertical(
+            Static("Your History", id="title"),
+            OptionList(id="history_list"),
+            Static("", id="message"),
+            Button("Back", id="back_btn"),
+        )
+
+    def on_mount(self):
+        self._cursor = None
+        self._exhausted = False
+        self._loading = False
+        history_list = self.query_one("#history_list", OptionList)
+        self.watch(history_list, "scroll_y", self._on_scroll, init=False)
+        self.load_page()
+
+    def load_page(self):
+        if self._loading or self._exhausted:
+            return
+        self._loading = True
+        self.run_worker(self._load_page(), group="history", exclusive=True)
+
+    async def _load_page(self):
+        history_list = self.query_one("#history_list", OptionList)
+        message = self.query_one("#message", Static)
+        try:
+            entries = await run_blocking(
+                get_user_history_page, self.app.user_id, PAGE_SIZE, self._cursor
+            )
+        finally:
+            self._loading = False
+
+        if len(entries) < PAGE_SIZE:
+            self._exhausted = True
+        if entries:
+            self._cursor = entries[-1].cursor
+            history_list.add_options(Text(f"- {entry.fact}") for entry in entries)
+
+        count = history_list.option_count
+        if not count:
+            message.update("(no history)")
+        else:
+            message.update(f"{count} facts" + ("" if self._exhausted else ", scroll for more"))
+
+        # Keep loading until the list can scroll, or there is nothing left
+        if not self._exhausted and history_list.max_scroll_y == 0:
+            self.call_after_refresh(self.load_page)
+
+    def _on_scroll(self, _old: float, new: float):
+        history_list = self.query_one("#history_list", OptionList)
+        if new >= history_list.max_scroll_y - PREFETCH_MARGIN:
+            self.load_page()
+
+    def on_option_list_option_highlighted(self, event: OptionList.OptionHighlighted):
+        if event.option_index >= event.option_list.option_count - PREFETCH_MARGIN:
+            self.load_page()
+
+    def on_button_pressed(self, event):
+        if event.button.id == "back_btn":
+            self.workers.cancel_group(self, "history")
+            self.app.pop_screen()
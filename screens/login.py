@@ -1,4 +1,6 @@
 # screens/login.py
+import asyncio
+
 from textual.screen import Screen
 from textual.widgets import Button, Input, Static
 from textual.containers import Vertical
@@ -25,12 +27,18 @@ class LoginScreen(Screen):
         if btn == "login_btn":
             username = self.query_one("#username", Input).value
             password = self.query_one("#password", Input).value
-            token = login(username, password)
-            if token:
-                user = get_user_by_token(token)
-                self.app.username = username
-                self.app.user_id = user.id if user else None
-                self.app.push_screen("menu")
-            else:
-                self.query_one("#message", Static).update("Login failed — check credentials.")
-                self.app.bell()
+            self.query_one("#message", Static).update("Logging in...")
+            self.run_worker(self._login(username, password), group="auth", exclusive=True)
+
+    async def _login(self, username: str, password: str):
+        # Password hashing is slow on purpose; keep it off the event loop
+        token = await asyncio.to_thread(login, username, password)
+        if token:
+            user = await asyncio.to_thread(get_user_by_token, token)
+            self.app.username = username
+            self.app.user_id = user.id if user else None
+            self.query_one("#message", Static).update("")
+            self.app.push_screen("menu")
+        else:
+            self.query_one("#message", Static).update("Login failed — check credentials.")
+            self.app.bell()
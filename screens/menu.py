@@ -3,6 +3,7 @@ from textual.widgets import Button, Static
 from textual.containers import VerticalScroll, Grid
 
 from app.auth import get_local_token, logout
+from screens.history import HistoryScreen
 from screens.show_fact import ShowFactScreen
 
 
@@ -47,5 +48,9 @@ class MenuScreen(Screen):
             self.app.push_screen("add_fact")
             return
 
+        if btn == "history":
+            self.app.push_screen(HistoryScreen())
+            return
+
         self.app.current_category = btn
         self.app.push_screen(ShowFactScreen())
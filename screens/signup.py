@@ -1,3 +1,5 @@
+import asyncio
+
 from textual.screen import Screen
 from textual.widgets import Button, Input, Static
 from textual.containers import Vertical
@@ -28,9 +30,14 @@ class SignupScreen(Screen):
                 self.app.bell()
                 return
 
-            ok = signup(username, password)
-            if ok:
-                self.query_one("#message", Static).update("Account created! You can now log in.")
-            else:
-                self.query_one("#message", Static).update("Username taken. Try another.")
-                self.app.bell()
+            self.query_one("#message", Static).update("Creating account...")
+            self.run_worker(self._signup(username, password), group="auth", exclusive=True)
+
+    async def _signup(self, username: str, password: str):
+        # Password hashing is slow on purpose; keep it off the event loop
+        ok = await asyncio.to_thread(signup, username, password)
+        if ok:
+            self.query_one("#message", Static).update("Account created! You can now log in.")
+        else:
+            self.query_one("#message", Static).update("Username taken. Try another.")
+            self.app.bell()
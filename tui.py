@@ -31,6 +31,12 @@ class FactsTUI(App):
         else:
             self.push_screen("login")
 
+    async def on_unmount(self):
+        from app.agent import aclose_llm_clients
+
+        # The model's async connections live on this app's event loop
+        await aclose_llm_clients()
+
     def compose(self) -> ComposeResult:
         yield Header(show_clock=True)
         yield Footer()